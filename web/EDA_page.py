@@ -1,50 +1,196 @@
 import streamlit as st
-import pickle
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
 import plotly.express as px
-import seaborn as sns
 
-from pathlib import Path
+from eda_figures import kde_groups
+from profiling import timed_stage
+from resources import cached_resource, get_eda_figures, get_player_stats, get_risk_calibration
+from scoring import RISK_LEVELS, selected_features
 
-dir = Path(__file__).resolve().parent  # Get the directory of the script file
+importances = np.array([0.1247882 , 0.13674124, 0.1333653 , 0.09538118, 0.10400137,
+                        0.08574381, 0.08472132, 0.07205066, 0.07965443, 0.08355248])
 
-path_to_shap = dir / 'model' / 'shap_values.pkl'
-path_to_player = dir / 'data' / 'PlayerStats.csv'
-path_to_train = dir / 'data' / 'X_train.csv'
+# Shown until calibration.py has written a usable report for the current model
+average_ratios = [0.089157, 0.230045, 0.477567, 0.933685]
+conf_intervals = [(0.069154, 0.109160), (0.200591, 0.259500), (0.432563, 0.522572), (0.856938, 1.010433)]
+
+# Figures are built once per process and reused on every rerun
+
+
+@timed_stage
+@cached_resource
+def injury_pie_figure():
+    df_player = get_player_stats()
+    proportions_player_injury = df_player['INJURED_TYPE'].value_counts() / len(df_player)
+    labels = ['No Injury', 'Sprained Ankle', 'Sore Knee', 'Sore Ankle', 'Sore Lower Back', 'Knee Injury']
+    labels = [labels[5], labels[1], labels[3], labels[2], labels[4]]
+    sizes = proportions_player_injury.values.tolist()
+    sizes = [sizes[5], sizes[1], sizes[3], sizes[2], sizes[4]]
+    colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#c2c2f0']
+    fig = go.Figure(data=[go.Pie(labels=labels, values=sizes, textinfo='label+percent', hole=0.4, hoverinfo='value', 
+                                marker=dict(colors=colors, line=dict(color='#000000', width=2)))])
+    fig.update_layout(
+    title={'text': 'Player Injury Proportions', 'font': {'size': 22}},  # add your title here and set the font size
+    legend=dict(orientation='h', x=0.5, y=-0.1, xanchor='center', yanchor='top')
+    )
+    return fig
+
+
+@timed_stage
+@cached_resource
+def importance_figure():
+    selected_display = [feat.replace('_', ' ') for feat in selected_features]
+    importance_df = pd.DataFrame({'features': selected_display, 'importance': importances})
+    importance_df = importance_df.sort_values(by='importance', ascending=False)
+
+    fig2 = go.Figure(go.Bar(
+    y=importance_df['features'],
+    x=importance_df['importance'],
+    orientation='h',
+    marker=dict(color='skyblue'),
+    ))
+    fig2.update_layout(
+        title={'text': 'Feature Importance', 'font': {'size': 22}},  # add your title here and set the font size
+        xaxis_title='Importance',
+        yaxis_title='Features',
+        width=500,
+        height=550,
+        xaxis=dict(
+            title_font=dict(size=20),
+            tickfont=dict(size=16),
+        ),
+        yaxis=dict(
+            autorange='reversed',
+            title_font=dict(size=20),
+            tickfont=dict(size=16),
+        ),
+    )
+    return fig2
+
+
+@timed_stage
+@cached_resource
+def kde_figure(feature):
+    figures = get_eda_figures()
+    i = selected_features.index(feature)
+
+    fig3 = go.Figure()
+    for j, (group, color) in enumerate(zip(kde_groups, ['royalblue', 'darkturquoise'])):
+        fig3.add_trace(go.Scatter(
+            x=figures['kde_x'][i, j],
+            y=figures['kde_density'][i, j],
+            mode='lines',
+            name=group,
+            fill='tozeroy',
+            line=dict(color=color),
+        ))
 
-with open(path_to_shap, 'rb') as f:
-    shap_values = pickle.load(f)
+    fig3.update_layout(
+        width=650,
+        height=450,
+        plot_bgcolor='white',
+        xaxis=dict(
+            title=feature.replace('_', ' '),
+            title_font=dict(size=18),
+        ),
+        yaxis=dict(
+            title='Density',
+            title_font=dict(size=18),
+            showticklabels=False,
+        ),
+        legend=dict(x=0.99, y=0.99, xanchor='right'),
+    )
+    return fig3
+
+
+@timed_stage
+@cached_resource
+def shap_figure(feature):
+    figures = get_eda_figures()
+    i = selected_features.index(feature)
+    shap_x, shap_y = figures['shap_x'][:, i], figures['shap_y'][:, i]
+    display = feature.replace('_', ' ')
+
+    scatter = go.Figure()
+
+    scatter.add_trace(go.Scatter(
+        x=shap_x,
+        y=shap_y,
+        mode='markers',
+        name='Data',
+        marker=dict(size=3)  
+    ))
 
-df_player = pd.read_csv(path_to_player)
-X_train = pd.read_csv(path_to_train)
+   
+    scatter.add_shape(
+        type='line',
+        y0=0, y1=0,
+        x0=shap_x.min(), x1=shap_x.max(),
+        line=dict(color='Red', width=2),  
+    )
+
+    scatter.update_layout(
+        title={'text' :f'SHAP value of {display}',
+               'font':dict(size=22)},
+        autosize=False,
+        width=650,  
+        height=500,  
+        plot_bgcolor='white',  
+        xaxis=dict(
+            title=display,
+            title_font=dict(size=18, color='DarkBlue'),  
+            gridcolor='lightgrey',  
+        ),
+        yaxis=dict(
+            title='SHAP Value',
+            title_font=dict(size=18, color='DarkBlue'), 
+            gridcolor='lightgrey',  
+        )
+    )
+    return scatter
+
+
+@timed_stage
+@cached_resource
+def confidence_figure():
+    calibration = get_risk_calibration()
+    if calibration is None:
+        ratios, intervals = average_ratios, conf_intervals
+    else:
+        levels = calibration['levels']
+        ratios = [level['injured_ratio'] for level in levels]
+        intervals = [(level['ci_lower'], level['ci_upper']) for level in levels]
+    ratios = np.array(ratios, dtype=float)  # empty risk levels come through as NaN and are left blank
+    lower, upper = np.array(intervals, dtype=float).T
+
+    error_y = dict(type='data', array=upper - ratios, arrayminus=ratios - lower, visible=True)
+
+    fig4 = go.Figure(data=go.Bar(name='Risk Levels', x=RISK_LEVELS.tolist(), y=ratios, error_y=error_y))
+
+    fig4.update_layout(
+        title={
+            'text': 'Average Injured Ratio with 95% Confidence Interval for each Risk Level',
+            'font': dict(size=22)  
+        },
+        xaxis=dict(
+            tickfont=dict(size=16), 
+        ),
+        yaxis=dict(
+            title='Average Injured Ratio',
+            title_font=dict(size=18),  
+            tickfont=dict(size=16),  
+        )
+    )
+    return fig4
 
-selected_features = ['DIST_MILES', 'PACE', 'POSS', 'FRONT_CT_TOUCHES', 'MIN', 'FGA_PG',
-                     'USG_PCT', 'PAINT_TOUCHES', 'AVG_SPEED', 'AVG_DRIB_PER_TOUCH']
-
-importances = np.array([0.1247882 , 0.13674124, 0.1333653 , 0.09538118, 0.10400137,
-                        0.08574381, 0.08472132, 0.07205066, 0.07965443, 0.08355248])
 
 def show_eda_page():
         st.write("## Exploratory Data Analysis")
         st.write("### Distribution of Cumulative Injuries: Key Areas of Focus")
         st.write('In this section, we provide an in-depth analysis of the distribution of injuries among players. We identify the most common types of injuries and depict their relative frequencies in a visual format. The aim is to shed light on the critical areas that demand immediate attention to improve players\' health and reduce game downtime.')
-        proportions_player_injury = df_player['INJURED_TYPE'].value_counts() / len(df_player)
-        labels = ['No Injury', 'Sprained Ankle', 'Sore Knee', 'Sore Ankle', 'Sore Lower Back', 'Knee Injury']
-        labels = [labels[5], labels[1], labels[3], labels[2], labels[4]]
-        sizes = proportions_player_injury.values.tolist()
-        sizes = [sizes[5], sizes[1], sizes[3], sizes[2], sizes[4]]
-        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#c2c2f0']
-        fig = go.Figure(data=[go.Pie(labels=labels, values=sizes, textinfo='label+percent', hole=0.4, hoverinfo='value', 
-                                    marker=dict(colors=colors, line=dict(color='#000000', width=2)))])
-        fig.update_layout(
-        title={'text': 'Player Injury Proportions', 'font': {'size': 22}},  # add your title here and set the font size
-        legend=dict(orientation='h', x=0.5, y=-0.1, xanchor='center', yanchor='top')
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(injury_pie_figure(), use_container_width=True)
         st.markdown('---')
         st.write("### Feature Importance and Distributions")
         st.write("In this section, we delve into the significant factors influencing player injuries. Utilizing the feature importance derived from our predictive model, we rank these factors based on their contribution to the model's predictive power. To enhance interactivity and facilitate a deeper exploration, we provide a select box that allows you to choose which feature's distribution you wish to examine.")
@@ -53,32 +199,7 @@ def show_eda_page():
         
         selected_display = [feat.replace('_', ' ') for feat in selected_features]
 
-        importance_df = pd.DataFrame({'features': selected_display, 'importance': importances})
-        importance_df = importance_df.sort_values(by='importance', ascending=False)
-
-        fig2 = go.Figure(go.Bar(
-        y=importance_df['features'],
-        x=importance_df['importance'],
-        orientation='h',
-        marker=dict(color='skyblue'),
-        ))
-        fig2.update_layout(
-            title={'text': 'Feature Importance', 'font': {'size': 22}},  # add your title here and set the font size
-            xaxis_title='Importance',
-            yaxis_title='Features',
-            width=500,
-            height=550,
-            xaxis=dict(
-                title_font=dict(size=20),
-                tickfont=dict(size=16),
-            ),
-            yaxis=dict(
-                autorange='reversed',
-                title_font=dict(size=20),
-                tickfont=dict(size=16),
-            ),
-        )
-        st.plotly_chart(fig2)
+        st.plotly_chart(importance_figure())
 
         selected_feature_display_kde = st.selectbox("Select feature to view KDE", selected_display, key='kde')
 
@@ -86,25 +207,7 @@ def show_eda_page():
         st.write("")
         st.markdown(f"#### KDE Plot of {selected_feature_display_kde}")
 
-        df_filtered_0 = df_player[df_player['INJURY'] == 0]
-        df_filtered_1 = df_player[df_player['INJURY'] == 1]
-
-        sns.set_palette(['royalblue', 'darkturquoise'])
-
-        fig3, ax = plt.subplots(figsize=(4, 3), dpi=200) 
-        sns.kdeplot(data=df_filtered_0, x=selected_feature_kde, fill=True, label='Not Injured', common_norm=False)
-        sns.kdeplot(data=df_filtered_1, x=selected_feature_kde, fill=True, label='Injured', common_norm=False)
-
-        ax.tick_params(axis='x', labelsize=4.5)
-
-        ax.set_xlabel(f'{selected_feature_display_kde}', fontsize=6)
-        ax.set_ylabel('Density', fontsize=6)
-
-        ax.yaxis.set_ticks([])
-
-        ax.legend(fontsize=6)
-
-        st.pyplot(fig3)
+        st.plotly_chart(kde_figure(selected_feature_kde))
 
         st.markdown('---')
         st.write("### Understanding Feature Interactions through SHAP Values")
@@ -119,76 +222,12 @@ def show_eda_page():
 
         selected_feature_shap = selected_feature_display_shap.replace(' ', '_')
 
-        shap_df = pd.DataFrame(shap_values[1], columns=selected_features)
-
-        scatter = go.Figure()
-
-        scatter.add_trace(go.Scatter(
-            x=X_train[selected_feature_shap],
-            y=shap_df[selected_feature_shap],
-            mode='markers',
-            name='Data',
-            marker=dict(size=3)  
-        ))
-
-   
-        scatter.add_shape(
-            type='line',
-            y0=0, y1=0,
-            x0=min(X_train[selected_feature_shap]), x1=max(X_train[selected_feature_shap]),
-            line=dict(color='Red', width=2),  
-        )
-
-        scatter.update_layout(
-            title={'text' :f'SHAP value of {selected_feature_display_shap}',
-                   'font':dict(size=22)},
-            autosize=False,
-            width=650,  
-            height=500,  
-            plot_bgcolor='white',  
-            xaxis=dict(
-                title=selected_feature_display_shap,
-                title_font=dict(size=18, color='DarkBlue'),  
-                gridcolor='lightgrey',  
-            ),
-            yaxis=dict(
-                title='SHAP Value',
-                title_font=dict(size=18, color='DarkBlue'), 
-                gridcolor='lightgrey',  
-            )
-        )
-        st.plotly_chart(scatter)
+        st.plotly_chart(shap_figure(selected_feature_shap))
 
         st.markdown('---')
         st.write("### Confidence in Predictions: Modeling Uncertainty")
         st.write('Establishing confidence in our model predictions is key to their usefulness in real-world applications. We present the average injury risk ratio along with a 95% confidence interval for each risk level category. This analysis provides an uncertainty range for our predictions, highlighting the inherent variability in data and modelling processes, and thus supporting robust decision-making.')
-        average_ratios = [0.089157, 0.230045, 0.477567, 0.933685]
-
-        conf_intervals = [(0.069154, 0.109160), (0.200591, 0.259500), (0.432563, 0.522572), (0.856938, 1.010433)]
-
-        yerr = [[average - lower for average, (lower, upper) in zip(average_ratios, conf_intervals)],
-                [upper - average for average, (lower, upper) in zip(average_ratios, conf_intervals)]]
-
-        error_y=dict(type='data', array=yerr[0] + yerr[1], visible=True)
-
-        fig4 = go.Figure(data=go.Bar(name='Risk Levels', x=['Low Risk', 'Moderate Risk', 'Increased Risk', 'High Risk'],
-                                    y=average_ratios, error_y=error_y))
-
-        fig4.update_layout(
-            title={
-                'text': 'Average Injured Ratio with 95% Confidence Interval for each Risk Level',
-                'font': dict(size=22)  
-            },
-            xaxis=dict(
-                tickfont=dict(size=16), 
-            ),
-            yaxis=dict(
-                title='Average Injured Ratio',
-                title_font=dict(size=18),  
-                tickfont=dict(size=16),  
-            )
-        )
-        st.plotly_chart(fig4)
+        st.plotly_chart(confidence_figure())
 
         st.write("---")
         st.write("### Final Thoughts and Further Exploration")
@@ -1,51 +1,122 @@
+import functools
+
 import streamlit as st
-import pickle
 import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
 
-from pathlib import Path
-
-dir = Path(__file__).resolve().parent  # Get the directory of the script file
+from explain import explain_row, top_contributions
+from profiling import timed_stage
+from resources import cached_resource, get_explainer, get_model, get_name_index, get_player_stats, get_risk_index
+from scoring import RISK_LEVELS, RISK_THRESHOLDS, risk_levels, selected_features
+from sweep import DEFAULT_SPREAD, DEFAULT_STEPS, score_sweep, sweep_axes
 
-path_to_model = dir / 'model' / 'rf_clf.pkl'
-path_to_player = dir / 'data' / 'PlayerStats.csv'
+SWEEP_CACHE_SIZE = 256
 
-with open(path_to_model, 'rb') as file:
-    rf_clf = pickle.load(file)
 
-df_player = pd.read_csv(path_to_player)
+# PlayerStats without the injury labels, as shown in the Player lookup
+@cached_resource
+def get_lookup_frame():
+    return get_player_stats().drop(['INJURY', 'INJURED_TYPE'], axis=1)
 
+@timed_stage
 def format_player_data(player):
-    return player.applymap(lambda x: '{:.2f}'.format(x) if isinstance(x, float) else x)
+    return player.applymap(lambda x: '{:.2f}'.format(x) if isinstance(x, (float, np.floating)) else x)
 
 # Find Player function
+@timed_stage
 def find_player(name, season):
-    player = df_player[(df_player['SEARCH'] == name) & (df_player['SEASON'] == season)]
-    return player
+    entry = get_risk_index().get((name, season))
+    rows = list(entry.rows) if entry else []
+    return get_lookup_frame().iloc[rows]
+
+# Precomputed risk level of a player-season in our database
+@timed_stage
+def lookup_risk_level(name, season):
+    return str(RISK_LEVELS[get_risk_index()[(name, season)].level])
 
 # Prediction function
+@timed_stage
 def predict_risk_level(data):
-    probability = rf_clf.predict_proba(data)[0][1]
-    if probability > HIGH_RISK_THRESHOLD:
-        return "High Risk"
-    elif HIGH_RISK_THRESHOLD >= probability > MODERATE_RISK_THRESHOLD:
-        return "Increased Risk"
-    elif MODERATE_RISK_THRESHOLD >= probability > LOW_RISK_THRESHOLD:
-        return "Moderate Risk"
-    else:
-        return "Low Risk"
+    probability = get_model().predict_proba(data)[:1, 1]
+    return str(risk_levels(probability)[0])
 
-df_player = df_player.drop(['INJURY', 'INJURED_TYPE'], axis=1)
-df_display = format_player_data(df_player.head(3))
+# Features that moved this player's predicted injury probability the most
+@timed_stage
+def show_explanation(player):
+    explanation = top_contributions(explain_row(get_explainer(), player))
+    player = player.iloc[0] if isinstance(player, pd.DataFrame) else player
+    lines = [f"- **{feature.replace('_', ' ')}** of {float(player[feature]):.2f} "
+             f"{'raises' if value > 0 else 'lowers'} the injury probability by {abs(value):.1%}"
+             for feature, value in explanation.items()]
+    st.markdown("**Top contributing features**\n\n" + "\n".join(lines))
 
-df_player["SEARCH"] = df_player["PLAYER_NAME"].str.lower()
-df_player.insert(2, "SEARCH", df_player.pop("SEARCH"))
 
-# Define the thresholds as constants
-LOW_RISK_THRESHOLD = 0.25
-MODERATE_RISK_THRESHOLD = 0.5
-HIGH_RISK_THRESHOLD = 0.75
+# Risk level message, with the features behind it alongside when an explanation was asked for
+def show_result(status, player, explain):
+    message = f"Based on our model's analysis of the entered statistics, this player falls into the {status} category for potential injuries."
+    if not explain:
+        st.success(message)
+        return
+    col1, col2 = st.columns([3, 2])
+    col1.success(message)
+    with col2:
+        with st.spinner('Explaining...'):
+            show_explanation(player)
+
+# Player name and season inputs, with ranked suggestions for the name
+def select_player():
+    col1, col2 = st.columns(2)
+    name = col1.text_input("Player Name (For example: Stephen Curry)",
+                           help="Press Enter to list matching players; part of a name, such as 'steph', is enough")
+    season = col2.text_input("Season (For example: 22-23)")
+    # text_input only reruns the page on Enter or leaving the field, so suggestions follow a submitted name,
+    # not each keystroke. Ranked matches for misspelled names, initials and accents; an exact match is listed first
+    suggestions = get_name_index().search(name) if name.strip() else []
+    if suggestions:
+        name = col1.selectbox("Matching players", suggestions)
+    return name.lower(), season
+
+# Risk probability over a grid of one or two features, cached per player and sweep settings
+@timed_stage
+@functools.lru_cache(maxsize=SWEEP_CACHE_SIZE)
+def sweep_probabilities(vector, features, spread, steps):
+    base = pd.Series(vector, index=selected_features)
+    fallback = {feature: (get_player_stats()[feature].min(), get_player_stats()[feature].max()) for feature in features}
+    axes = sweep_axes(base, features, spread, steps, fallback)
+    probabilities = score_sweep(get_model(), base, axes)
+    probabilities.setflags(write=False)  # shared by every caller that hits the cache
+    return axes, probabilities
+
+@timed_stage
+def sweep_figure(player, axes, probabilities):
+    features = list(axes)
+    displays = [feature.replace('_', ' ') for feature in features]
+    fig = go.Figure()
+    if len(features) == 1:
+        x = axes[features[0]]
+        fig.add_trace(go.Scatter(x=x, y=probabilities, mode='lines', name='Injury probability'))
+        for threshold, level in zip(RISK_THRESHOLDS, RISK_LEVELS[1:]):
+            fig.add_hline(y=threshold, line=dict(color='grey', dash='dash'), annotation_text=level,
+                          annotation_position='top left')
+        fig.add_vline(x=player[features[0]], line=dict(color='red'), annotation_text='Current')
+        fig.update_layout(xaxis_title=displays[0], yaxis=dict(title='Injury Probability', range=[0, 1]))
+    else:
+        x, y = axes[features[0]], axes[features[1]]
+        fig.add_trace(go.Heatmap(x=x, y=y, z=probabilities, zmin=0, zmax=1, colorscale='RdYlGn_r',
+                                 colorbar=dict(title='Probability')))
+        # Tier boundaries drawn as contour lines over the heat map
+        fig.add_trace(go.Contour(x=x, y=y, z=probabilities, showscale=False, hoverinfo='skip',
+                                 contours=dict(coloring='none', showlabels=True, start=RISK_THRESHOLDS[0],
+                                               end=RISK_THRESHOLDS[-1], size=RISK_THRESHOLDS[1] - RISK_THRESHOLDS[0]),
+                                 line=dict(color='black', width=2)))
+        fig.add_trace(go.Scatter(x=[player[features[0]]], y=[player[features[1]]], mode='markers', name='Current',
+                                 marker=dict(color='white', size=12, line=dict(color='black', width=2))))
+        fig.update_layout(xaxis_title=displays[0], yaxis_title=displays[1], showlegend=False)
+    fig.update_layout(title={'text': 'Injury Probability as ' + ' and '.join(displays) + ' Change',
+                             'font': {'size': 22}}, height=550)
+    return fig
 
     
 def show_predict_page():
@@ -71,19 +142,19 @@ def show_predict_page():
 
     mode = option_menu(
         menu_title=None,
-        options=["Player", "Data"],
+        options=["Player", "Data", "What-if"],
         default_index=0,
         orientation="horizontal"
     )
     if mode == 'Player':
         st.write("Our database includes data from players who have participated in a minimum of 20 games during a season. The available seasons range from 2013-14 to 2022-23. To explore the injury risk of a player in our database, simply input their name and the corresponding season.")
         st.write("Alternatively, if you have your own dataset or are interested in assessing the injury risk of a player not included in our database, you can select the **Data** option and input any player's statistics to generate an injury risk prediction.")
-        col1, col2 = st.columns(2)
-        name = col1.text_input("Player Name (For example: Stephen Curry)")
-        season = col2.text_input("Season (For example: 22-23)")
+        name, season = select_player()
 
+        # SHAP imports scikit-learn and takes seconds to load, so it is only loaded once someone asks for it
+        explain = st.checkbox("Explain the prediction", key=f"explain_{mode}",
+                              help="Lists the features that moved the predicted injury probability the most.")
         predict_button = st.button("Predict")
-        name = name.lower()
 
         if predict_button:
             try:
@@ -94,14 +165,11 @@ def show_predict_page():
                 st.write(ve)
             else:
                 try:
-                    # Show a loading message
-                    st.table(format_player_data(player.drop("SEARCH", axis=1)))
-                    player = player.drop(['PLAYER_NAME', "SEARCH", 'SEASON'], axis=1)
-                    with st.spinner('Predicting...'):
-                        # Call the prediction function
-                        status = predict_risk_level(player)
+                    # Show the player's statistics
+                    st.table(format_player_data(player))
+                    status = lookup_risk_level(name, season)
                     # Show the result
-                    st.success(f"Based on our model's analysis of the entered statistics, this player falls into the {status} category for potential injuries.")
+                    show_result(status, player, explain)
                 except Exception as e:
                     st.write(f"An error occurred during prediction: {e}")
 
@@ -118,7 +186,7 @@ def show_predict_page():
         """)
 
         st.write("Here are three examples for reference:")
-        st.table(df_display.head(3))
+        st.table(format_player_data(get_lookup_frame().head(3)))
         
         col1, col2 = st.columns(2)
         dist_miles = col1.number_input("Miles Traveled per Game (DIST_MILES)", step=0.01)
@@ -134,6 +202,9 @@ def show_predict_page():
         avg_drib_per_touch = col2.number_input("Average Dribbles per Touch (AVG_DRIB_PER_TOUCH)", step=0.01)
 
 
+        # SHAP imports scikit-learn and takes seconds to load, so it is only loaded once someone asks for it
+        explain = st.checkbox("Explain the prediction", key=f"explain_{mode}",
+                              help="Lists the features that moved the predicted injury probability the most.")
         predict_button = st.button("Predict")
 
         if predict_button:
@@ -159,4 +230,28 @@ def show_predict_page():
                     status = predict_risk_level(player_manual)
 
             # Show the result
-            st.success(f"Based on our model's analysis of the entered statistics, this player falls into the {status} category for potential injuries.")
+            show_result(status, player_manual, explain)
+
+
+    elif mode == 'What-if':
+
+        st.write("See how a player's predicted injury probability would change if their workload went up or down. Choose a player and season from our database, then one or two statistics to vary. The other statistics stay at the player's values for that season.")
+        name, season = select_player()
+
+        col1, col2, col3 = st.columns([2, 1, 1])
+        features = col1.multiselect("Statistics to vary (up to two)", selected_features, default=['MIN', 'DIST_MILES'],
+                                    max_selections=2, format_func=lambda feature: feature.replace('_', ' '))
+        spread = col2.slider("Range around the player (±%)", 10, 100, int(DEFAULT_SPREAD * 100), step=10) / 100
+        steps = col3.slider("Grid points per statistic", 10, 50, DEFAULT_STEPS, step=5)
+
+        if name and season and features:
+            player = find_player(name, season)
+            if player.empty:
+                st.write("Apologies, but this player does not exist in our database for the entered season or the season does not exist.")
+            else:
+                player = player.iloc[0]
+                vector = tuple(float(player[feature]) for feature in selected_features)
+                with st.spinner('Scoring the grid...'):
+                    axes, probabilities = sweep_probabilities(vector, tuple(features), spread, steps)
+                st.plotly_chart(sweep_figure(player, axes, probabilities), use_container_width=True)
+                st.write("Dashed lines and contours mark the boundaries between the Low, Moderate, Increased and High Risk levels.")
@@ -2,6 +2,7 @@ import streamlit as st
 from streamlit_option_menu import option_menu
 from Predict_page import show_predict_page
 from EDA_page import show_eda_page
+from profiling import profile_rerun
 
 with st.sidebar:
     selected = option_menu(
@@ -10,7 +11,8 @@ with st.sidebar:
     )
 
 
-if selected == "Predict Model":
-    show_predict_page()
-elif selected == "EDA":
-    show_eda_page()
\ No newline at end of file
+with profile_rerun(selected):
+    if selected == "Predict Model":
+        show_predict_page()
+    elif selected == "EDA":
+        show_eda_page()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_path(path):
+    """A unique temporary path next to path, moved over path once the block finishes without error.
+
+    Each writer gets its own temporary file, so processes rebuilding the same artifact at once never write into
+    each other's file, and readers only ever see the old file or a complete new one."""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        # mkstemp creates the file readable by its owner only; keep the permissions a plain open() would give
+        mode = path.stat().st_mode if path.exists() else 0o644
+        os.chmod(tmp_name, mode & 0o777)
+        yield Path(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
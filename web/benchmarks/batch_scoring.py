@@ -0,0 +1,53 @@
+"""Rows per second of the batch scoring engine against the single-row Predict page path.
+
+Run from the ``web`` directory: ``python -m benchmarks.batch_scoring``
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from Predict_page import predict_risk_level
+from resources import path_to_player
+from scoring import load_model, score_batch, risk_levels, selected_features
+
+
+def rows_per_second(n_rows, seconds):
+    return n_rows / seconds if seconds else float('inf')
+
+
+def bench_single_row(features, n_rows):
+    start = time.perf_counter()
+    for i in range(n_rows):
+        predict_risk_level(features.iloc[[i]])
+    return rows_per_second(n_rows, time.perf_counter() - start)
+
+
+def bench_batch(model, features, chunk_size):
+    start = time.perf_counter()
+    risk_levels(score_batch(model, features, chunk_size))
+    return rows_per_second(len(features), time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--single-rows", default=200, type=int,
+                        help="rows to push through the single-row path (it is slow)")
+    parser.add_argument("--repeat", default=10, type=int, help="copies of PlayerStats to score in batch mode")
+    parser.add_argument("--chunk-size", default=10_000, type=int)
+    args = parser.parse_args(argv)
+
+    features = pd.read_csv(path_to_player)[selected_features]
+    predict_risk_level(features.iloc[[0]])  # load the model outside the timed loops
+    batch = pd.concat([features] * args.repeat, ignore_index=True)
+
+    single = bench_single_row(features, min(args.single_rows, len(features)))
+    batched = bench_batch(load_model(bulk=True), batch, args.chunk_size)
+
+    print(f"single-row path: {single:12,.0f} rows/s")
+    print(f"batch engine:    {batched:12,.0f} rows/s  ({len(batch):,} rows, chunk size {args.chunk_size:,})")
+    print(f"speed-up:        {batched / single:12,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Latency of sklearn's predict_proba versus the flat NumPy forest, for batch sizes 1 through 10k.
+
+Run from the ``web`` directory after ``python forest.py``: ``python -m benchmarks.forest``
+"""
+import argparse
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from forest import FlatForest, path_to_flat_model, path_to_model, path_to_player
+from scoring import selected_features
+
+LOAD_SNIPPETS = {
+    'sklearn': f"import pickle; pickle.load(open({str(path_to_model)!r}, 'rb'))",
+    'flat': f"from forest import FlatForest; FlatForest.load({str(path_to_flat_model)!r})",
+}
+
+
+def median_ms(predict, X, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def cold_load_ms(snippet):
+    # Import and load in a fresh interpreter, which is what a new app instance pays
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', snippet], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=[1, 10, 100, 1000, 10_000], type=int, nargs="+")
+    parser.add_argument("--repeat", default=20, type=int)
+    args = parser.parse_args(argv)
+
+    with open(path_to_model, 'rb') as file:
+        sklearn_model = pickle.load(file)
+    flat_model = FlatForest.load()
+
+    features = pd.read_csv(path_to_player)[selected_features]
+    features = pd.concat([features] * (max(args.sizes) // len(features) + 1), ignore_index=True)
+
+    print(f"{'batch':>7} {'sklearn ms':>11} {'flat ms':>9} {'speed-up':>9}")
+    for size in args.sizes:
+        X = features.head(size)
+        repeat = max(3, args.repeat if size <= 1000 else args.repeat // 4)
+        sklearn_ms = median_ms(sklearn_model.predict_proba, X, repeat)
+        flat_ms = median_ms(flat_model.predict_proba, X, repeat)
+        print(f"{size:>7,} {sklearn_ms:>11.2f} {flat_ms:>9.2f} {sklearn_ms / flat_ms:>8.1f}x")
+
+    print()
+    for name, snippet in LOAD_SNIPPETS.items():
+        print(f"cold import + load, {name}: {cold_load_ms(snippet):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Latency of the app's hot paths on synthetic data at 1x, 10x and 100x the current row counts.
+
+Run from the ``web`` directory: ``python -m benchmarks.hot_paths -o results.json``
+and later ``python -m benchmarks.hot_paths --baseline results.json`` to flag regressions.
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import EDA_page
+import Predict_page
+from eda_figures import build_eda_figures, path_to_shap, path_to_train
+from name_search import NameIndex
+from resources import get_model
+from risk_index import build_risk_index
+from scoring import risk_levels, score_batch, selected_features
+from storage import path_to_player
+from sweep import score_sweep, sweep_axes
+
+web_dir = Path(__file__).resolve().parent.parent
+
+# Cold start of a fresh app process: page imports, then each artifact the pages load on first use
+COLD_START_SNIPPET = """
+import json, time
+timings = {}
+start = time.perf_counter()
+import Predict_page, EDA_page
+timings['import_pages'] = time.perf_counter() - start
+import resources
+for name in ['get_model', 'get_player_stats', 'get_risk_index', 'get_name_index', 'get_eda_figures',
+             'get_risk_calibration', 'get_explainer']:
+    start = time.perf_counter()
+    getattr(resources, name)()
+    timings['load_' + name[len('get_'):]] = time.perf_counter() - start
+print(json.dumps({name: seconds * 1000 for name, seconds in timings.items()}))
+"""
+
+
+def scale_rows(df, scale, rng, jitter_columns=selected_features):
+    # Copies after the first get renamed players and slightly perturbed stats, so lookups, caches and
+    # density estimates see scale times as many distinct player-seasons
+    copies = []
+    for k in range(scale):
+        copy = df.copy()
+        if k:
+            if 'PLAYER_NAME' in copy:
+                copy['PLAYER_NAME'] = copy['PLAYER_NAME'] + f" {k}"
+            columns = [column for column in jitter_columns if column in copy]
+            copy[columns] = copy[columns] * rng.normal(1, 0.02, size=(len(copy), len(columns)))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def measure(function, repeat, budget=2.0):
+    """Milliseconds per call: up to repeat calls, stopping early once budget seconds are spent."""
+    timings = []
+    deadline = time.perf_counter() + budget
+    while len(timings) < repeat and (not timings or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+@contextmanager
+def patched(module, **attributes):
+    # Point a page's resource getters at the synthetic tables, so the real page functions are timed
+    saved = {name: getattr(module, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def cold_start():
+    output = subprocess.run([sys.executable, '-c', COLD_START_SNIPPET], cwd=web_dir, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run_scale(scale, sources, model, repeat, rng):
+    df_player = scale_rows(sources['player'], scale, rng)
+    X_train = scale_rows(sources['train'], scale, rng)
+    shap_values = [np.tile(values, (scale, 1)) for values in sources['shap']]
+    features = df_player[selected_features]
+    lookup_frame = df_player.drop(['INJURY', 'INJURED_TYPE'], axis=1)
+
+    results = {}
+
+    def bench(name, function, rows=len(df_player)):
+        timings = measure(function, repeat)
+        results[name] = {'scale': scale, 'rows': rows, 'calls': len(timings),
+                         'median_ms': float(np.median(timings)), 'min_ms': float(np.min(timings))}
+
+    index = None
+
+    def build_index():
+        nonlocal index
+        index = build_risk_index(model, df_player)
+
+    bench('build_risk_index', build_index)
+    bench('build_name_index', lambda: NameIndex(df_player['PLAYER_NAME'].unique()))
+
+    keys = itertools.cycle(rng.permutation(list(index))[:1000].tolist())
+    with patched(Predict_page, get_risk_index=lambda: index, get_lookup_frame=lambda: lookup_frame):
+        bench('find_player', lambda: Predict_page.find_player(*next(keys)))
+
+    name_index = NameIndex(df_player['PLAYER_NAME'].unique())
+    queries = itertools.cycle(['stephn curry', 'aj lawsn', 'giannis antetokunpo', 'steph', 'lebron 7'])
+    bench('name_search', lambda: name_index.search(next(queries)))
+
+    if scale == 1:
+        # Scoring one row does not depend on how many rows the tables hold
+        rows = itertools.cycle(range(len(features)))
+        bench('predict_risk_level', lambda: Predict_page.predict_risk_level(features.iloc[[next(rows)]]), rows=1)
+        bench('format_player_data', lambda: Predict_page.format_player_data(lookup_frame.iloc[:2]), rows=2)
+        axes = sweep_axes(df_player.iloc[0], ['MIN', 'DIST_MILES'], steps=50)
+        bench('score_sweep_50x50', lambda: score_sweep(model, df_player.iloc[0], axes), rows=2500)
+    bench('predict_risk_level_batch', lambda: risk_levels(score_batch(model, features)))
+    bench('format_player_data_table', lambda: Predict_page.format_player_data(lookup_frame))
+
+    figures = None
+
+    def build_figures():
+        nonlocal figures
+        figures = build_eda_figures(df_player, X_train, shap_values)
+
+    bench('build_eda_figures', build_figures)
+    with patched(EDA_page, get_player_stats=lambda: df_player, get_eda_figures=lambda: figures):
+        for builder in [EDA_page.injury_pie_figure, EDA_page.importance_figure, EDA_page.confidence_figure]:
+            bench(builder.__name__, inspect.unwrap(builder))  # unwrapped: timed without the figure cache
+        for builder in [EDA_page.kde_figure, EDA_page.shap_figure]:
+            bench(builder.__name__, lambda builder=builder: inspect.unwrap(builder)('DIST_MILES'))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before and result['median_ms'] > before['median_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: {before['median_ms']:.2f} -> {result['median_ms']:.2f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=[1, 10, 100], type=int, nargs="+")
+    parser.add_argument("--repeat", default=20, type=int, help="most calls timed per benchmark")
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("-o", "--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON output to compare against")
+    parser.add_argument("--tolerance", default=0.25, type=float,
+                        help="slow-down over the baseline median that counts as a regression")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    with open(path_to_shap, 'rb') as file:
+        sources = {'player': pd.read_csv(path_to_player), 'train': pd.read_csv(path_to_train),
+                   'shap': pickle.load(file)}
+    model = get_model()
+
+    # Results are keyed "benchmark@scale" so runs with different --scales still compare
+    results = {}
+    if not args.skip_cold_start:
+        for name, ms in cold_start().items():
+            results[f"{name}@1"] = {'scale': 1, 'rows': len(sources['player']), 'calls': 1,
+                                    'median_ms': ms, 'min_ms': ms}
+    for scale in args.scales:
+        for name, result in run_scale(scale, sources, model, args.repeat, rng).items():
+            results[f"{name}@{scale}"] = result
+
+    print(f"{'benchmark':<28} {'scale':>5} {'rows':>9} {'median ms':>11} {'min ms':>10}")
+    for key, result in results.items():
+        print(f"{key.split('@')[0]:<28} {result['scale']:>4}x {result['rows']:>9,} "
+              f"{result['median_ms']:>11.3f} {result['min_ms']:>10.3f}")
+
+    if args.output:
+        report = {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                  'numpy': np.__version__, 'pandas': pd.__version__, 'model': type(model).__name__,
+                  'results': results}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        print(f"\n{len(regressions)} regressions over {args.tolerance:.0%} against {args.baseline}")
+        for line in regressions:
+            print(f"  {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
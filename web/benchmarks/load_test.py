@@ -0,0 +1,80 @@
+"""Load test for the scoring service: many concurrent clients sending single predictions.
+
+Start the service first (``python service.py``), then run from the ``web`` directory:
+``python -m benchmarks.load_test --clients 64 --requests 200``
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import selected_features
+from storage import path_to_player
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, rows, n_requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, 'POST', '/predict', rows[i % len(rows)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    features = pd.read_csv(path_to_player)[selected_features].sample(frac=1, random_state=0)
+    rows = features.to_dict(orient='records')
+    latencies, errors = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, rows[i::args.clients], args.requests, latencies, errors)
+                           for i in range(args.clients)))
+    seconds = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{len(latencies):,} requests from {args.clients} clients in {seconds:.2f} s "
+          f"({len(latencies) / seconds:,.0f} req/s), {len(errors)} errors")
+    print(f"client latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {max(latencies):.1f}")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, metrics = await request(reader, writer, args.host, 'GET', '/metrics')
+    writer.close()
+    batches = metrics['model_batches']
+    print(f"server model batches: {batches['count']:,} for {batches['rows']:,} rows, "
+          f"mean size {batches['mean_size']:.1f}, max {batches['max_size']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8000, type=int)
+    parser.add_argument("--clients", default=64, type=int, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", default=200, type=int, help="requests sent by each client")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
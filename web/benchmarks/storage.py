@@ -0,0 +1,71 @@
+"""Load time and resident memory of PlayerStats from CSV versus the memory-mapped Arrow copy, as the row count grows.
+
+Run from the ``web`` directory on Linux: ``python -m benchmarks.storage``
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from pathlib import Path
+
+from storage import convert_csv, path_to_player, read_table
+
+
+def rss_mb():
+    # Current resident set size; ru_maxrss is no use here because Linux carries it over from the parent
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def measure_load(csv_path, fmt):
+    # Runs in a fresh interpreter so each measurement starts from the same baseline
+    if fmt == 'arrow':
+        load = read_table
+    else:
+        load = lambda path: pd.read_csv(path)
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    df = load(csv_path)
+    df.select_dtypes('number').sum()  # touch every numeric column
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'rss_mb': rss_mb() - baseline, 'rows': len(df)}))
+
+
+def run_child(csv_path, fmt):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.storage', '--child', fmt, str(csv_path)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=[1, 10, 100], type=int, nargs="+",
+                        help="how many copies of PlayerStats.csv to stack")
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure_load(Path(args.child[1]), args.child[0])
+        return
+
+    base = pd.read_csv(path_to_player)
+    print(f"{'rows':>10} {'format':>7} {'load ms':>10} {'extra RSS MB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            csv_path = Path(tmp) / f'PlayerStats_x{scale}.csv'
+            pd.concat([base] * scale, ignore_index=True).to_csv(csv_path, index=False)
+            convert_csv(csv_path)
+            for fmt in ('csv', 'arrow'):
+                result = run_child(csv_path, fmt)
+                print(f"{result['rows']:>10,} {fmt:>7} {result['seconds'] * 1000:>10.1f} {result['rss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
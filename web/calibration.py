@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoring import (RISK_LEVELS, RISK_THRESHOLDS, default_model_path, load_model, model_hash, risk_level_codes, score_batch,
+                     selected_features)
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_train = dir / 'data' / 'X_train.csv'
+path_to_calibration = dir / 'model' / 'risk_calibration.json'
+
+DEFAULT_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+
+
+def labelled_player_seasons(df_player):
+    # A player-season with several injury types appears once per type; count it once
+    return df_player.drop_duplicates(['PLAYER_NAME', 'SEASON']).reset_index(drop=True)
+
+
+def held_out(df_player, df_train):
+    # The forest scores its own training rows almost perfectly, so keeping them would report in-sample rates
+    # with zero-width intervals; a row is in-sample when its feature vector appears in X_train
+    seen = pd.MultiIndex.from_frame(df_train[selected_features])
+    return df_player[~pd.MultiIndex.from_frame(df_player[selected_features]).isin(seen)].reset_index(drop=True)
+
+
+def cell_counts(levels, labels, n_levels=len(RISK_LEVELS)):
+    """Player-seasons per (risk level, injured) cell, shape (n_levels, 2)."""
+    return np.bincount(levels * 2 + labels, minlength=n_levels * 2).reshape(n_levels, 2)
+
+
+def bootstrap_multinomial(counts, n_resamples, seed):
+    # Resampling N rows with replacement only changes how many rows land in each (level, label) cell,
+    # and those counts follow a multinomial distribution; drawing them directly gives the same bootstrap
+    rng = np.random.default_rng(seed)
+    total = counts.sum()
+    draws = rng.multinomial(total, counts.ravel() / total, size=n_resamples)
+    return draws.reshape(n_resamples, *counts.shape)
+
+
+def _resample_chunk(codes, n_cells, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    picked = codes[rng.integers(0, len(codes), size=(n_resamples, len(codes)))]
+    picked += np.arange(n_resamples)[:, np.newaxis] * n_cells
+    return np.bincount(picked.ravel(), minlength=n_resamples * n_cells).reshape(n_resamples, n_cells)
+
+
+def bootstrap_resample(levels, labels, n_resamples, seed, workers=None, chunk_size=250):
+    """Explicit row resampling, split across worker processes; matches bootstrap_multinomial in distribution."""
+    n_levels = len(RISK_LEVELS)
+    codes = (levels * 2 + labels).astype(np.int32)
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        chunks = pool.map(_resample_chunk, [codes] * len(sizes), [n_levels * 2] * len(sizes), sizes, seeds)
+        draws = np.concatenate(list(chunks))
+    return draws.reshape(n_resamples, n_levels, 2)
+
+
+def injury_rates(counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts[..., 1] / counts.sum(axis=-1)
+
+
+def calibrate(probabilities, labels, thresholds=RISK_THRESHOLDS, n_resamples=DEFAULT_RESAMPLES,
+              confidence=CONFIDENCE, seed=0, method='multinomial', workers=None):
+    """Injury rate of each risk level with a percentile bootstrap confidence interval."""
+    levels = risk_level_codes(probabilities, thresholds)
+    labels = np.asarray(labels, dtype=np.int64)
+    counts = cell_counts(levels, labels)
+
+    if method == 'multinomial':
+        draws = bootstrap_multinomial(counts, n_resamples, seed)
+    else:
+        draws = bootstrap_resample(levels, labels, n_resamples, seed, workers)
+    alpha = (1 - confidence) / 2
+    # A level left empty by a resample has no rate there, so it is left out of that level's interval
+    lower, upper = np.nanquantile(injury_rates(draws), [alpha, 1 - alpha], axis=0)
+    rates = injury_rates(counts)
+
+    return {
+        'thresholds': [float(threshold) for threshold in thresholds],
+        'confidence': confidence,
+        'n_resamples': n_resamples,
+        'levels': [
+            {'level': str(level), 'players': int(counts[i].sum()), 'injured': int(counts[i, 1]),
+             'injured_ratio': None if np.isnan(rates[i]) else float(rates[i]),
+             'ci_lower': None if np.isnan(lower[i]) else float(lower[i]),
+             'ci_upper': None if np.isnan(upper[i]) else float(upper[i])}
+            for i, level in enumerate(RISK_LEVELS)
+        ],
+    }
+
+
+def has_degenerate_intervals(report):
+    # Every interval collapsing to a point is what scoring in-sample rows looks like, not a measured rate
+    widths = [level['ci_upper'] - level['ci_lower'] for level in report.get('levels', [])
+              if level['ci_lower'] is not None]
+    return all(width == 0 for width in widths)
+
+
+def load_calibration(path=path_to_calibration, model_path=None):
+    """The saved report, or None when it is missing, covers other tier boundaries, was made for another model,
+    or has only zero-width intervals."""
+    try:
+        with open(path) as file:
+            report = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if report.get('thresholds') != RISK_THRESHOLDS.tolist():
+        return None
+    if model_path is not None and report.get('model_hash') != model_hash(model_path):
+        return None
+    if has_degenerate_intervals(report):
+        return None
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Injury rate per risk level with bootstrap confidence intervals.")
+    parser.add_argument("--data", default=path_to_player, type=Path, help="labelled player-seasons (INJURY column)")
+    parser.add_argument("--train", default=path_to_train, type=Path,
+                        help="the model's training features; player-seasons found here are left out")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--output", default=path_to_calibration, type=Path)
+    parser.add_argument("--thresholds", type=float, nargs=3, default=list(RISK_THRESHOLDS),
+                        metavar=("LOW", "MODERATE", "HIGH"), help="tier boundaries to evaluate")
+    parser.add_argument("--resamples", default=DEFAULT_RESAMPLES, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--method", choices=["multinomial", "resample"], default="multinomial",
+                        help="draw cell counts directly, or resample rows explicitly across processes")
+    parser.add_argument("--workers", type=int, help="processes for --method resample (default: one per core)")
+    args = parser.parse_args(argv)
+    if args.thresholds != RISK_THRESHOLDS.tolist() and args.output == path_to_calibration:
+        parser.error("pass --output with --thresholds; the default report is the one the EDA page shows")
+
+    labelled = labelled_player_seasons(pd.read_csv(args.data))
+    data = held_out(labelled, pd.read_csv(args.train))
+    if data.empty:
+        parser.error(f"every player-season in {args.data} is in the training data {args.train}")
+    model_path = args.model or default_model_path(bulk=True)
+    probabilities = score_batch(load_model(model_path), data)
+
+    start = time.perf_counter()
+    report = calibrate(probabilities, data['INJURY'], np.array(args.thresholds), args.resamples,
+                       seed=args.seed, method=args.method, workers=args.workers)
+    seconds = time.perf_counter() - start
+    report['model_hash'] = model_hash(model_path)
+    report['in_sample_excluded'] = len(labelled) - len(data)
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{args.resamples:,} bootstrap resamples of {len(data):,} held-out player-seasons "
+          f"({report['in_sample_excluded']:,} in-sample left out) in {seconds:.2f} s", file=sys.stderr)
+    for level in report['levels']:
+        ratio = level['injured_ratio']
+        interval = (f"[{level['ci_lower']:.3f}, {level['ci_upper']:.3f}]" if level['ci_lower'] is not None
+                    else "n/a")
+        print(f"{level['level']:>15}: {level['injured']:>5}/{level['players']:<5} injured "
+              f"{'n/a' if ratio is None else f'{ratio:.3f}'} {interval}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+from atomic import atomic_path
+from hashing import content_hash
+from scoring import selected_features
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_shap = dir / 'model' / 'shap_values.pkl'
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_train = dir / 'data' / 'X_train.csv'
+path_to_figures = dir / 'model' / 'eda_figures.npz'
+
+# Same defaults as seaborn's kdeplot: Scott's rule bandwidth, 200 points, grid extended 3 bandwidths past the data
+KDE_GRIDSIZE = 200
+KDE_CUT = 3
+KDE_CHUNK_SIZE = 8192
+
+# Rows of the kde arrays
+kde_groups = ['Not Injured', 'Injured']
+
+
+def gaussian_kde(values, gridsize=KDE_GRIDSIZE, cut=KDE_CUT):
+    """Gaussian kernel density of values on an evenly spaced grid, evaluated in one matrix operation."""
+    values = np.asarray(values, dtype=np.float64)
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    grid = np.linspace(values.min() - cut * bandwidth, values.max() + cut * bandwidth, gridsize)
+    density = np.zeros(gridsize)
+    # Chunked so the grid x values matrix stays small however many player-seasons there are
+    for start in range(0, len(values), KDE_CHUNK_SIZE):
+        z = (grid[:, None] - values[None, start:start + KDE_CHUNK_SIZE]) / bandwidth
+        density += np.exp(-0.5 * z ** 2).sum(axis=1)
+    return grid, density / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+
+def build_eda_figures(df_player, X_train, shap_values):
+    injured = df_player['INJURY'].to_numpy() == 1
+    kde_x = np.empty((len(selected_features), len(kde_groups), KDE_GRIDSIZE))
+    kde_density = np.empty_like(kde_x)
+    for i, feature in enumerate(selected_features):
+        values = df_player[feature].to_numpy()
+        for j, group in enumerate([~injured, injured]):
+            kde_x[i, j], kde_density[i, j] = gaussian_kde(values[group])
+
+    return {
+        'features': np.array(selected_features),
+        'kde_x': kde_x,
+        'kde_density': kde_density,
+        'shap_x': X_train[selected_features].to_numpy(dtype=np.float32),
+        'shap_y': np.asarray(shap_values[1], dtype=np.float32),
+    }
+
+
+def load_eda_figures(player_path=path_to_player, train_path=path_to_train, shap_path=path_to_shap,
+                     figures_path=path_to_figures):
+    """Load the precomputed figure arrays, rebuilding them when any of their sources has changed."""
+    source_hash = content_hash(player_path, train_path, shap_path)
+    try:
+        with np.load(figures_path) as stored:
+            if str(stored['source_hash']) == source_hash:
+                return {key: stored[key] for key in stored.files if key != 'source_hash'}
+    except (OSError, KeyError, ValueError):
+        pass
+
+    with open(shap_path, 'rb') as file:
+        shap_values = pickle.load(file)
+    figures = build_eda_figures(pd.read_csv(player_path), pd.read_csv(train_path), shap_values)
+    try:
+        with atomic_path(figures_path) as tmp_path, open(tmp_path, 'wb') as file:
+            np.savez_compressed(file, source_hash=source_hash, **figures)
+    except OSError:
+        pass  # read-only deploys still render, they just recompute on each cold start
+    return figures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the KDE curves and SHAP scatter data of the EDA page.")
+    parser.parse_args(argv)
+
+    figures = load_eda_figures()
+    print(f"{len(figures['features'])} features written to {path_to_figures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import functools
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from forest import FlatForest
+from scoring import load_model, selected_features
+
+EXPLANATION_CACHE_SIZE = 4096
+
+
+def build_explainer(model):
+    # Exact path-dependent Tree SHAP, computed locally by shap's compiled extension.
+    # shap imports scikit-learn, so it is only imported once an explanation is needed
+    import shap
+
+    if isinstance(model, FlatForest):
+        return shap.TreeExplainer(model.to_shap_model())
+    return shap.TreeExplainer(model)
+
+
+def base_value(explainer):
+    # Average predicted injury probability over the training data
+    return float(np.atleast_1d(explainer.expected_value)[-1])
+
+
+def _injury_shap_values(explainer, features):
+    values = explainer.shap_values(features, check_additivity=False)
+    # Classifiers return one array per class; we explain the injured class
+    return values[1] if isinstance(values, list) else values
+
+
+@functools.lru_cache(maxsize=EXPLANATION_CACHE_SIZE)
+def _explain_vector(explainer, vector):
+    features = pd.DataFrame([vector], columns=selected_features)
+    values = _injury_shap_values(explainer, features)[0]
+    values.setflags(write=False)  # shared by every caller that hits the cache
+    return values
+
+
+def explain_row(explainer, row):
+    """SHAP value of each feature for a single player, cached by feature vector."""
+    if isinstance(row, pd.DataFrame):
+        row = row.iloc[0]
+    vector = tuple(float(row[feature]) for feature in selected_features)
+    return pd.Series(_explain_vector(explainer, vector), index=selected_features)
+
+
+def top_contributions(explanation, n=3):
+    return explanation.reindex(explanation.abs().sort_values(ascending=False).index[:n])
+
+
+_worker_explainer = None
+
+
+def _init_worker(model):
+    global _worker_explainer
+    _worker_explainer = build_explainer(model)
+
+
+def _explain_chunk(features):
+    return _injury_shap_values(_worker_explainer, features)
+
+
+def explain_batch(model, data, workers=1, chunk_size=256):
+    """SHAP values for every row of data, one column per feature, split across worker processes."""
+    features = data[selected_features]
+    if workers <= 1 or len(features) <= chunk_size:
+        values = _injury_shap_values(build_explainer(model), features)
+    else:
+        chunks = [features.iloc[start:start + chunk_size] for start in range(0, len(features), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+            values = np.concatenate(list(pool.map(_explain_chunk, chunks)))
+    return pd.DataFrame(values, columns=selected_features, index=data.index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute SHAP explanations for a CSV of player-seasons.")
+    parser.add_argument("input", help="CSV file containing the ten model feature columns")
+    parser.add_argument("-o", "--output", help="where to write the explanations (default: stdout)")
+    parser.add_argument("--season", help="only explain rows of this SEASON, e.g. 22-23")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--workers", default=os.cpu_count() or 1, type=int, help="worker processes")
+    args = parser.parse_args(argv)
+
+    data = pd.read_csv(args.input)
+    if args.season:
+        data = data[data['SEASON'] == args.season]
+
+    start = time.perf_counter()
+    explanations = explain_batch(load_model(args.model), data, args.workers).add_prefix('SHAP_')
+    seconds = time.perf_counter() - start
+
+    id_columns = [column for column in ('PLAYER_NAME', 'SEASON') if column in data.columns]
+    result = pd.concat([data[id_columns], explanations], axis=1)
+    result.to_csv(args.output if args.output else sys.stdout, index=False)
+    print(f"Explained {len(result):,} rows in {seconds:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+from hashing import content_hash
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_model = dir / 'model' / 'rf_clf.pkl'
+path_to_flat_model = dir / 'model' / 'rf_flat.npz'
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+
+
+class FlatForest:
+    """A fitted random forest flattened into NumPy arrays, scored without scikit-learn.
+
+    The nodes of all trees are concatenated: ``roots[t]`` is the first node of tree ``t``. Leaves point
+    both children at themselves. ``value`` holds each node's class probabilities, normalized the way
+    sklearn's trees normalize them.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right, value, node_sample_weight,
+                 roots, classes, feature_names, source_hash=''):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.node_sample_weight = node_sample_weight
+        self.roots = roots
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+        self.source_hash = str(source_hash)  # content hash of the pickle this forest was exported from
+        self.is_leaf = children_left == np.arange(len(children_left))
+
+    @classmethod
+    def from_sklearn(cls, model):
+        arrays = {name: [] for name in ('feature', 'threshold', 'children_left', 'children_right', 'value',
+                                        'node_sample_weight', 'roots')}
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+
+            arrays['feature'].append(np.where(leaf, 0, tree.feature))
+            arrays['threshold'].append(tree.threshold)
+            arrays['children_left'].append(np.where(leaf, nodes, tree.children_left) + offset)
+            arrays['children_right'].append(np.where(leaf, nodes, tree.children_right) + offset)
+            arrays['value'].append(value / normalizer)
+            arrays['node_sample_weight'].append(tree.weighted_n_node_samples)
+            arrays['roots'].append([offset])
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(arrays['feature']).astype(np.intp),
+            threshold=np.concatenate(arrays['threshold']).astype(np.float64),
+            children_left=np.concatenate(arrays['children_left']).astype(np.intp),
+            children_right=np.concatenate(arrays['children_right']).astype(np.intp),
+            value=np.concatenate(arrays['value']),
+            node_sample_weight=np.concatenate(arrays['node_sample_weight']),
+            roots=np.concatenate(arrays['roots']).astype(np.intp),
+            classes=np.asarray(model.classes_),
+            feature_names=np.asarray(getattr(model, 'feature_names_in_', []), dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path=path_to_flat_model):
+        with np.load(path) as arrays:
+            arrays = {name: arrays[name] for name in arrays.files}
+        for name in ('feature', 'children_left', 'children_right', 'roots'):
+            arrays[name] = arrays[name].astype(np.intp)  # stored narrow, indexed natively
+        return cls(**arrays)
+
+    @staticmethod
+    def recorded_source_hash(path=path_to_flat_model):
+        # Reads only the hash, not the tree arrays; exports made before hashes were recorded give ''
+        with np.load(path) as arrays:
+            return str(arrays['source_hash']) if 'source_hash' in arrays.files else ''
+
+    def save(self, path=path_to_flat_model):
+        with open(path, 'wb') as file:
+            np.savez(file, feature=self.feature.astype(np.int16), threshold=self.threshold,
+                     children_left=self.children_left.astype(np.int32),
+                     children_right=self.children_right.astype(np.int32), value=self.value,
+                     node_sample_weight=self.node_sample_weight, roots=self.roots.astype(np.int32),
+                     classes=self.classes_, feature_names=self.feature_names_in_, source_hash=self.source_hash)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame) and len(self.feature_names_in_):
+            X = X[list(self.feature_names_in_)]
+        # sklearn's trees compare float32 inputs against float64 thresholds; so do we
+        X = np.asarray(X, dtype=np.float32)
+        if not np.isfinite(X).all():
+            # NaN fails every split comparison and would silently descend right; sklearn refuses it too
+            raise ValueError("Input X contains NaN, infinity or a value too large for dtype('float32').")
+        return X
+
+    def apply(self, X):
+        """Leaf reached in every tree by every sample, shape (n_estimators, n_samples).
+
+        All (tree, sample) pairs descend one level per step; pairs drop out as they reach a leaf.
+        """
+        X = self._as_array(X)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        nodes = np.repeat(self.roots, n_samples)
+        row_offsets = np.tile(np.arange(n_samples) * n_features, self.n_estimators)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(self.n_estimators, n_samples)
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((leaves.shape[1], len(self.classes_)))
+        # Add the trees one at a time, in order, so the floating point sum matches sklearn bit for bit
+        for tree_leaves in leaves:
+            proba += self.value[tree_leaves]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def to_shap_model(self):
+        """The forest in shap's custom tree format, so TreeExplainer works without the sklearn pickle."""
+        trees = []
+        bounds = np.append(self.roots, len(self.feature))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            nodes = np.arange(end - start)
+            leaf = self.children_left[start:end] - start == nodes
+            left = np.where(leaf, -1, self.children_left[start:end] - start)
+            trees.append({
+                'children_left': left,
+                'children_right': np.where(leaf, -1, self.children_right[start:end] - start),
+                'children_default': left,
+                'features': np.where(leaf, -2, self.feature[start:end]),
+                'thresholds': np.where(leaf, -2.0, self.threshold[start:end]),
+                'values': self.value[start:end] / self.n_estimators,
+                'node_sample_weight': self.node_sample_weight[start:end],
+            })
+        return {'trees': trees, 'tree_output': 'probability', 'input_dtype': np.float32,
+                'internal_dtype': np.float64}
+
+
+def export_forest(model, validation_data, path=path_to_flat_model, source_hash=''):
+    """Flatten model, check it reproduces sklearn's probabilities exactly on validation_data, and save it."""
+    flat = FlatForest.from_sklearn(model)
+    flat.source_hash = source_hash
+    expected = model.predict_proba(validation_data)
+    actual = flat.predict_proba(validation_data)
+    if not np.array_equal(expected, actual):
+        mismatches = np.count_nonzero((expected != actual).any(axis=1))
+        raise ValueError(f"Flattened forest disagrees with sklearn on {mismatches} of {len(expected)} rows")
+    flat.save(path)
+    return flat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the pickled random forest to flat NumPy arrays.")
+    parser.add_argument("--model", default=path_to_model, type=Path, help="pickled random forest")
+    parser.add_argument("--output", default=path_to_flat_model, type=Path)
+    parser.add_argument("--validate", default=path_to_player, type=Path,
+                        help="CSV of player-seasons whose probabilities must match exactly")
+    args = parser.parse_args(argv)
+
+    with open(args.model, 'rb') as file:
+        model = pickle.load(file)
+
+    validation_data = pd.read_csv(args.validate)
+    if hasattr(model, 'feature_names_in_'):
+        validation_data = validation_data[list(model.feature_names_in_)]
+    else:
+        validation_data = validation_data.select_dtypes('number').drop(columns=['INJURY'], errors='ignore')
+    # Random rows over a wider range exercise splits the real data never reaches
+    rng = np.random.default_rng(0)
+    low, high = validation_data.min().to_numpy(), validation_data.max().to_numpy()
+    span = high - low
+    random_rows = pd.DataFrame(rng.uniform(low - span, high + span, size=(10_000, len(low))),
+                               columns=validation_data.columns)
+    validation_data = pd.concat([validation_data, random_rows], ignore_index=True)
+
+    flat = export_forest(model, validation_data, args.output, content_hash(args.model))
+    print(f"Exported {flat.n_estimators} trees, {len(flat.feature):,} nodes to {args.output}; "
+          f"probabilities match sklearn exactly on {len(validation_data):,} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
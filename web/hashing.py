@@ -0,0 +1,11 @@
+import hashlib
+
+
+def content_hash(*paths):
+    """SHA-256 over the bytes of every file in paths, used to tell when a generated artifact is stale."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
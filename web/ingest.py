@@ -0,0 +1,151 @@
+import argparse
+import hashlib
+import pickle
+import sys
+import time
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic import atomic_path
+from risk_index import index_scores, index_source_hash, path_to_index, save_risk_index
+from scoring import default_model_path, load_model, model_hash, score_batch, selected_features
+from storage import columnar_path, convert_csv, path_to_merged, path_to_player, read_source_csv
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_state = dir / 'model' / 'ingest_state.pkl'
+
+MIN_GAMES_PLAYED = 20
+partition_columns = ['PLAYER_ID', 'SEASON']
+# Only these merged.csv columns feed PlayerStats, so edits to the others never trigger a rescore
+source_columns = ['PLAYER_ID', 'PLAYER_NAME', 'SEASON', 'GP'] + selected_features + ['INJURED_TYPE']
+player_columns = ['PLAYER_NAME', 'SEASON'] + selected_features + ['INJURED_TYPE', 'INJURY']
+
+
+def derive_player_stats(merged):
+    """PlayerStats rows from raw merged rows: one row per player-season and injury type, with the label."""
+    df = merged[merged['GP'] >= MIN_GAMES_PLAYED].copy()
+    df['INJURED_TYPE'] = df['INJURED_TYPE'].fillna('No_injury')
+    df = df.drop_duplicates(['PLAYER_ID', 'SEASON', 'INJURED_TYPE'])
+    df['INJURY'] = (df['INJURED_TYPE'] != 'No_injury').astype(int)
+    return df[['PLAYER_ID'] + player_columns]
+
+
+def partition_hashes(merged):
+    """Content hash of every (PLAYER_ID, SEASON) partition, in order of first appearance."""
+    row_hashes = pd.util.hash_pandas_object(merged[source_columns], index=False).to_numpy()
+    groups = merged.groupby(partition_columns, sort=False).ngroup().to_numpy()
+    order = np.argsort(groups, kind='stable')
+    bounds = np.flatnonzero(np.diff(groups[order])) + 1
+
+    first_rows = merged.iloc[order[np.r_[0, bounds]]] if len(merged) else merged
+    keys = zip(first_rows['PLAYER_ID'].tolist(), first_rows['SEASON'].tolist())
+    return {key: hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+            for key, rows in zip(keys, np.split(row_hashes[order], bounds))}
+
+
+def partition_keys(df):
+    return pd.MultiIndex.from_frame(df[partition_columns])
+
+
+def ingest(merged, model, model_digest, state=None):
+    """Bring the derived, scored table up to date with merged, recomputing only changed partitions.
+
+    Returns the new state and a summary of what was recomputed."""
+    hashes = partition_hashes(merged)
+    previous = state['hashes'] if state else {}
+    changed = [key for key, digest in hashes.items() if previous.get(key) != digest]
+    removed = previous.keys() - hashes.keys()
+    current = pd.MultiIndex.from_tuples(list(hashes), names=partition_columns)
+
+    if state is None:
+        kept = derive_player_stats(merged.iloc[:0]).assign(RISK_PROBABILITY=np.float64())
+    else:
+        table = state['table']
+        kept = table[partition_keys(table).isin(current) & ~partition_keys(table).isin(changed)]
+
+    fresh = derive_player_stats(merged[partition_keys(merged).isin(changed)])
+    to_score = fresh
+    if state is not None and state['model_hash'] != model_digest:
+        to_score = pd.concat([kept.drop(columns='RISK_PROBABILITY'), fresh])  # new model: everything is rescored
+        kept = kept.iloc[:0]
+    scored = to_score.assign(RISK_PROBABILITY=score_batch(model, to_score) if len(to_score) else np.float64())
+
+    # Partitions go back in merged.csv order, which is the order PlayerStats.csv has always had
+    table = pd.concat([kept, scored])
+    table = table.iloc[np.argsort(current.get_indexer(partition_keys(table)), kind='stable')]
+    table = table.reset_index(drop=True)
+
+    summary = {'partitions': len(hashes), 'new': sum(key not in previous for key in changed),
+               'changed': sum(key in previous for key in changed), 'removed': len(removed),
+               'rows': len(table), 'rows_scored': len(scored)}
+    return {'model_hash': model_digest, 'hashes': hashes, 'table': table}, summary
+
+
+def write_outputs(table, player_path, model_path, index_path):
+    # Write PlayerStats.csv, then the risk index from the probabilities we already have so the app does not rescore
+    player_stats = table[player_columns]
+    with atomic_path(player_path) as tmp_path:
+        player_stats.to_csv(tmp_path, index=False)
+
+    index = index_scores(player_stats, table['RISK_PROBABILITY'].to_numpy())
+    save_risk_index(index, index_source_hash(player_path, model_path), Path(index_path))
+    if columnar_path(player_path).exists():
+        convert_csv(player_path)
+
+
+def load_state(path=path_to_state):
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def save_state(state, path=path_to_state):
+    with atomic_path(path) as tmp_path, open(tmp_path, 'wb') as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def refresh(merged, model, model_path, player_path=path_to_player, index_path=path_to_index, state_path=path_to_state,
+            full=False):
+    """Run ingest against the saved state, then rewrite the outputs if any partition changed.
+
+    Returns the summary and whether PlayerStats.csv and the risk index were written."""
+    state = None if full else load_state(state_path)
+    state, summary = ingest(merged, model, model_hash(model_path), state)
+    # A changed partition can lose all its rows (GP falling under the minimum) without anything being scored
+    written = bool(summary['new'] or summary['changed'] or summary['removed'] or summary['rows_scored']
+                   or not Path(player_path).exists())
+    if written:
+        write_outputs(state['table'], player_path, model_path, index_path)
+    save_state(state, state_path)
+    return summary, written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive PlayerStats.csv from merged rows, rescoring only what changed.")
+    parser.add_argument("inputs", nargs="*", default=[path_to_merged], type=Path,
+                        help="merged.csv-format files, read together as the full history (default: merged.csv)")
+    parser.add_argument("--player", default=path_to_player, type=Path, help="PlayerStats.csv to write")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--index", default=path_to_index, type=Path)
+    parser.add_argument("--state", default=path_to_state, type=Path, help="partition hashes and scores of the last run")
+    parser.add_argument("--full", action="store_true", help="ignore the saved state and recompute every partition")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    merged = pd.concat([read_source_csv(path, source_columns) for path in args.inputs], ignore_index=True)
+    model_path = args.model or default_model_path(bulk=True)
+    summary, _ = refresh(merged, load_model(model_path), model_path, args.player, args.index, args.state, args.full)
+
+    print(f"{summary['partitions']:,} player-season partitions: {summary['new']:,} new, {summary['changed']:,} changed, "
+          f"{summary['removed']:,} removed; scored {summary['rows_scored']:,} of {summary['rows']:,} rows "
+          f"in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import pickle
+import re
+import time
+import unicodedata
+
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic import atomic_path
+from hashing import content_hash
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_merged = dir.parent / 'merged.csv'
+path_to_name_index = dir / 'model' / 'name_index.pkl'
+
+MIN_SCORE = 0.4  # share of the query's trigrams a name must contain to be suggested
+
+
+def normalize_name(name):
+    """Fold accents and case, drop punctuation: 'A.J. Lawson' -> 'aj lawson', 'Dončić' -> 'doncic'."""
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    name = re.sub(r"[.'’`]", '', name)  # initials and apostrophes join up: 'o.j.' -> 'oj', "o'brien" -> 'obrien'
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def trigrams(name, prefix=False):
+    # Each word is padded like '  word ', so word starts weigh more than the middle of a word.
+    # A prefix query leaves its last word open, so a partial name such as 'steph' matches 'stephen'
+    words = name.split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = '  ' + word + ('' if prefix and i == len(words) - 1 else ' ')
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """Trigram index over player names with ranked, typo-tolerant suggestions."""
+
+    def __init__(self, names):
+        self.names = []  # display names, one per normalized name
+        self.lookup = {}
+        for name in names:
+            key = normalize_name(name)
+            if key and key not in self.lookup:
+                self.lookup[key] = len(self.names)
+                self.names.append(name)
+
+        postings = defaultdict(list)
+        gram_counts = []
+        for position, key in enumerate(self.lookup):
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+        self.gram_counts = np.array(gram_counts, dtype=np.float32)
+
+    def state(self):
+        # Saved as plain containers so the file loads no matter which module pickled it
+        return {'names': self.names, 'lookup': self.lookup, 'postings': self.postings,
+                'gram_counts': self.gram_counts}
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        index.__dict__.update(state)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, query):
+        """Display name for a query that matches a player exactly once normalized, else None."""
+        position = self.lookup.get(normalize_name(query))
+        return None if position is None else self.names[position]
+
+    def search(self, query, limit=10, min_score=MIN_SCORE):
+        key = normalize_name(query)
+        if not key:
+            return []
+        grams = trigrams(key, prefix=True)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return []
+
+        # Shared trigrams per name, counted only through the posting lists of the query's trigrams
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        candidates = np.flatnonzero(shared >= min_score * len(grams))
+        shared = shared[candidates]
+        # Rank by how much of the query a name contains, then by how little of the name is left over
+        coverage = shared / len(grams)
+        dice = 2 * shared / (len(grams) + self.gram_counts[candidates])
+        order = np.lexsort((-dice, -coverage))[:limit]
+
+        suggestions = [self.names[position] for position in candidates[order]]
+        exact = self.resolve(key)
+        if exact is not None:
+            suggestions = [exact] + [name for name in suggestions if name != exact][:limit - 1]
+        return suggestions
+
+
+def read_player_names(*paths):
+    names = []
+    for path in paths:
+        names.extend(pd.read_csv(path, usecols=['PLAYER_NAME'], skipinitialspace=True)['PLAYER_NAME'].dropna())
+    return names
+
+
+def load_name_index(player_path=path_to_player, merged_path=path_to_merged, index_path=path_to_name_index):
+    """Load the on-disk name index, rebuilding it when either CSV has changed."""
+    paths = [path for path in (player_path, merged_path) if Path(path).exists()]
+    source_hash = content_hash(*paths)
+    try:
+        with open(index_path, 'rb') as file:
+            stored = pickle.load(file)
+        if stored['source_hash'] == source_hash:
+            return NameIndex.from_state(stored['index'])
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        pass
+
+    # PlayerStats comes first so its spelling of a name is the one displayed
+    index = NameIndex(read_player_names(*paths))
+    with atomic_path(index_path) as tmp_path, open(tmp_path, 'wb') as file:
+        pickle.dump({'source_hash': source_hash, 'index': index.state()}, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the player name search index, or query it.")
+    parser.add_argument("query", nargs="*", help="names to look up, e.g. 'aj grren'")
+    parser.add_argument("--limit", default=10, type=int)
+    args = parser.parse_args(argv)
+
+    index = load_name_index()
+    print(f"{len(index)} player names indexed in {path_to_name_index}")
+    for query in args.query:
+        start = time.perf_counter()
+        suggestions = index.search(query, args.limit)
+        microseconds = (time.perf_counter() - start) * 1e6
+        print(f"{query!r} ({microseconds:.0f} us): {', '.join(suggestions) or 'no match'}")
+
+
+if __name__ == "__main__":
+    main()
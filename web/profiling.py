@@ -0,0 +1,53 @@
+"""Opt-in latency breakdown of each Streamlit rerun.
+
+Start the app with ``INJURY_RISK_PROFILE=1 streamlit run app.py`` to log, after every rerun, how long the
+rerun took and how much of that each instrumented stage used. Stages are marked with ``timed_stage``;
+when profiling is off the decorator returns the function unchanged, so it costs nothing.
+"""
+import functools
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+from streamlit.logger import get_logger
+
+ENABLED = os.environ.get('INJURY_RISK_PROFILE', '').lower() not in ('', '0', 'false')
+
+logger = get_logger(__name__)
+_rerun = threading.local()  # Streamlit runs each session's script on its own thread
+
+
+def timed_stage(function):
+    if not ENABLED:
+        return function
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stages = getattr(_rerun, 'stages', None)
+            if stages is not None:
+                stages.append((function.__name__, (time.perf_counter() - start) * 1000))
+
+    return timed
+
+
+@contextmanager
+def profile_rerun(page):
+    if not ENABLED:
+        yield
+        return
+
+    _rerun.stages = []
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = (time.perf_counter() - start) * 1000
+        stages = ', '.join(f"{name} {ms:.1f} ms" for name, ms in _rerun.stages) or 'no instrumented stages'
+        logger.info("Rerun of %s page: %.1f ms total; %s", page, total, stages)
+        _rerun.stages = None
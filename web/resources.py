@@ -0,0 +1,85 @@
+import functools
+import time
+
+import streamlit as st
+from streamlit.logger import get_logger
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from pathlib import Path
+
+from calibration import load_calibration, path_to_calibration
+from eda_figures import load_eda_figures
+from explain import build_explainer
+from name_search import load_name_index
+from risk_index import load_risk_index
+from scoring import default_model_path, load_model
+from storage import read_table
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_shap = dir / 'model' / 'shap_values.pkl'
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_train = dir / 'data' / 'X_train.csv'
+
+logger = get_logger(__name__)
+
+# Every artifact is loaded at most once per process, on the first rerun of the page that needs it.
+# The returned objects are shared between sessions and pages, so callers must treat them as read-only.
+
+
+def cached_resource(load):
+    # st.cache_resource only caches inside a script run, so CLIs and benchmarks fall back to a process cache
+    streamlit_cached = st.cache_resource(show_spinner=False)(load)
+    process_cached = functools.lru_cache(maxsize=None)(load)
+
+    @functools.wraps(load)
+    def get(*args):
+        if get_script_run_ctx() is None:
+            return process_cached(*args)
+        return streamlit_cached(*args)
+
+    return get
+
+
+def _timed_load(name, load, *args):
+    start = time.perf_counter()
+    artifact = load(*args)
+    logger.info("Loaded %s in %.1f ms", name, (time.perf_counter() - start) * 1000)
+    return artifact
+
+
+@cached_resource
+def get_model():
+    path = default_model_path()
+    return _timed_load(path.name, load_model, path)
+
+
+@cached_resource
+def get_explainer():
+    return _timed_load('SHAP explainer', build_explainer, get_model())
+
+
+@cached_resource
+def get_risk_index():
+    # Scored with the app's own model: for a few thousand rows that beats importing scikit-learn
+    return _timed_load('risk index', load_risk_index, path_to_player, default_model_path())
+
+
+@cached_resource
+def get_name_index():
+    return _timed_load('name index', load_name_index)
+
+
+@cached_resource
+def get_eda_figures():
+    return _timed_load('EDA figures', load_eda_figures, path_to_player, path_to_train, path_to_shap)
+
+
+@cached_resource
+def get_player_stats():
+    return _timed_load('PlayerStats', read_table, path_to_player)
+
+
+@cached_resource
+def get_risk_calibration():
+    return _timed_load('risk calibration', load_calibration, path_to_calibration, default_model_path())
@@ -0,0 +1,83 @@
+import argparse
+import pickle
+
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from atomic import atomic_path
+from hashing import content_hash
+from scoring import default_model_path, load_model, model_hash, risk_level_codes, score_batch
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_index = dir / 'model' / 'risk_index.pkl'
+
+# rows: positions of the player-season in PlayerStats.csv; probability and level come from the first row,
+# which is the one the Predict page has always scored
+IndexEntry = namedtuple('IndexEntry', ['rows', 'probability', 'level'])
+
+
+def build_risk_index(model, df_player):
+    """Score every player-season once, keyed by (lowercased name, season)."""
+    return index_scores(df_player, score_batch(model, df_player))
+
+
+def index_scores(df_player, probabilities):
+    # Index probabilities already computed for every row of df_player
+    levels = risk_level_codes(probabilities)
+    keys = zip(df_player['PLAYER_NAME'].str.lower(), df_player['SEASON'])
+
+    index = {}
+    for row, key in enumerate(keys):
+        entry = index.get(key)
+        if entry is None:
+            index[key] = IndexEntry((row,), float(probabilities[row]), int(levels[row]))
+        else:
+            index[key] = entry._replace(rows=entry.rows + (row,))
+    return index
+
+
+def save_risk_index(index, source_hash, path=path_to_index):
+    # atomic, so concurrent app processes never read a half-written index
+    with atomic_path(path) as tmp_path, open(tmp_path, 'wb') as file:
+        pickle.dump({'source_hash': source_hash, 'entries': index}, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def index_source_hash(player_path, model_path):
+    # The model part is the same for the pickle and its flat export, which score identically
+    return content_hash(player_path) + model_hash(model_path)
+
+
+def load_risk_index(player_path=path_to_player, model_path=None, index_path=path_to_index):
+    """Load the on-disk index, rebuilding it when PlayerStats.csv or the model has changed."""
+    model_path = model_path or default_model_path(bulk=True)
+    source_hash = index_source_hash(player_path, model_path)
+    try:
+        with open(index_path, 'rb') as file:
+            stored = pickle.load(file)
+        if stored['source_hash'] == source_hash:
+            return stored['entries']
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        pass
+
+    index = build_risk_index(load_model(model_path), pd.read_csv(player_path))
+    save_risk_index(index, source_hash, index_path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the player-season risk index used by the Player lookup.")
+    parser.add_argument("--player", default=path_to_player, type=Path)
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--index", default=path_to_index, type=Path)
+    args = parser.parse_args(argv)
+
+    index = load_risk_index(args.player, args.model, args.index)
+    print(f"{len(index)} player-seasons indexed in {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import importlib.util
+import pickle
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+from forest import FlatForest
+from hashing import content_hash
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_model = dir / 'model' / 'rf_clf.pkl'
+path_to_flat_model = dir / 'model' / 'rf_flat.npz'
+
+selected_features = ['DIST_MILES', 'PACE', 'POSS', 'FRONT_CT_TOUCHES', 'MIN', 'FGA_PG',
+                     'USG_PCT', 'PAINT_TOUCHES', 'AVG_SPEED', 'AVG_DRIB_PER_TOUCH']
+
+# Define the thresholds as constants
+LOW_RISK_THRESHOLD = 0.25
+MODERATE_RISK_THRESHOLD = 0.5
+HIGH_RISK_THRESHOLD = 0.75
+
+RISK_THRESHOLDS = np.array([LOW_RISK_THRESHOLD, MODERATE_RISK_THRESHOLD, HIGH_RISK_THRESHOLD])
+RISK_LEVELS = np.array(["Low Risk", "Moderate Risk", "Increased Risk", "High Risk"])
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def sklearn_installed():
+    return importlib.util.find_spec('sklearn') is not None
+
+
+def flat_model_is_current():
+    """Whether the flat export exists and was made from the current pickle."""
+    if not path_to_flat_model.exists():
+        return False
+    if not path_to_model.exists():
+        return True  # NumPy-only deploys ship just the export
+    if FlatForest.recorded_source_hash(path_to_flat_model) == content_hash(path_to_model):
+        return True
+    warnings.warn(f"{path_to_flat_model.name} was not exported from the current {path_to_model.name}; "
+                  "scoring with the pickle until `python forest.py` is re-run")
+    return False
+
+
+def default_model_path(bulk=False):
+    """Model file to score with.
+
+    The flat export (forest.py) only needs NumPy and is fastest for the app's small batches. sklearn's
+    compiled trees are faster for thousands of rows, so bulk scoring uses the pickle when sklearn is installed.
+    """
+    if bulk and sklearn_installed() and path_to_model.exists():
+        return path_to_model
+    return path_to_flat_model if flat_model_is_current() else path_to_model
+
+
+def model_hash(path):
+    # Identifies the forest rather than the file: a flat export reports the pickle it was made from
+    path = Path(path)
+    if path.suffix == '.npz':
+        return FlatForest.recorded_source_hash(path) or content_hash(path)
+    return content_hash(path)
+
+
+def load_model(path=None, bulk=False):
+    path = Path(path) if path else default_model_path(bulk)
+    if path.suffix == '.npz':
+        return FlatForest.load(path)
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def risk_level_codes(probabilities, thresholds=RISK_THRESHOLDS):
+    # Index into RISK_LEVELS; each tier includes its upper threshold, like the original if/elif ladder
+    return np.searchsorted(thresholds, probabilities, side='left')
+
+
+def risk_levels(probabilities):
+    return RISK_LEVELS[risk_level_codes(probabilities)]
+
+
+def score_batch(model, data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Injury probability for every row of data, scoring chunk_size rows per model call."""
+    features = data[selected_features]
+    probabilities = np.empty(len(features))
+    for start in range(0, len(features), chunk_size):
+        chunk = features.iloc[start:start + chunk_size]
+        probabilities[start:start + chunk_size] = model.predict_proba(chunk)[:, 1]
+    return probabilities
+
+
+def score_frame(model, data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score a DataFrame or CSV path, returning it with RISK_PROBABILITY and RISK_LEVEL columns."""
+    if not isinstance(data, pd.DataFrame):
+        data = pd.read_csv(data)
+
+    missing = [feature for feature in selected_features if feature not in data.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+
+    probabilities = score_batch(model, data, chunk_size)
+    scored = data.copy()
+    scored['RISK_PROBABILITY'] = probabilities
+    scored['RISK_LEVEL'] = risk_levels(probabilities)
+    return scored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV of player-seasons into injury risk levels.")
+    parser.add_argument("input", help="CSV file containing the ten model feature columns")
+    parser.add_argument("-o", "--output", help="where to write the scored CSV (default: stdout)")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--chunk-size", default=DEFAULT_CHUNK_SIZE, type=int, help="rows per model call")
+    args = parser.parse_args(argv)
+
+    scored = score_frame(load_model(args.model, bulk=True), args.input, args.chunk_size)
+    scored.to_csv(args.output if args.output else sys.stdout, index=False)
+
+    counts = scored['RISK_LEVEL'].value_counts().reindex(RISK_LEVELS, fill_value=0)
+    print(f"Scored {len(scored)} rows: " + ", ".join(f"{level} {count}" for level, count in counts.items()),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Standalone HTTP scoring service for tools that need risk levels without the Streamlit UI.
+
+Endpoints (JSON in, JSON out):
+
+- ``POST /predict`` with either the ten feature values or ``{"name": ..., "season": ...}``
+- ``POST /predict/batch`` with ``{"players": [...]}``, each item in either form
+- ``GET /metrics`` request latency percentiles and model batch sizes
+- ``GET /health``
+
+Concurrent single predictions are coalesced into one model call per micro-batch window.
+Run from the ``web`` directory: ``python service.py --port 8000``
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from collections import Counter, defaultdict, deque
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from risk_index import load_risk_index
+from scoring import RISK_LEVELS, load_model, risk_levels, score_batch, selected_features
+from streaming import normalize_column
+
+MAX_BODY_BYTES = 10 * 2**20
+LATENCY_WINDOW = 10_000  # recent requests kept per endpoint for the latency percentiles
+ENDPOINTS = ('/predict', '/predict/batch', '/metrics', '/health')
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    def __init__(self):
+        self.requests = Counter()
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.batch_sizes = Counter()
+
+    def record_request(self, endpoint, status, seconds):
+        self.requests[f"{endpoint} {status}"] += 1
+        self.latencies[endpoint].append(seconds * 1000)
+
+    def record_batch(self, size):
+        self.batch_sizes[size] += 1
+
+    def snapshot(self):
+        latency = {}
+        for endpoint, values in self.latencies.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            latency[endpoint] = {'count': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                                 'max_ms': max(values)}
+        batches = sum(self.batch_sizes.values())
+        rows = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            'requests': dict(self.requests),
+            'latency': latency,
+            'model_batches': {'count': batches, 'rows': rows, 'mean_size': rows / batches if batches else 0,
+                              'max_size': max(self.batch_sizes, default=0),
+                              'sizes': dict(sorted(self.batch_sizes.items()))},
+        }
+
+
+class MicroBatcher:
+    """Collects single feature rows for up to max_wait seconds and scores them in one model call."""
+
+    def __init__(self, model, metrics, max_wait=0.002, max_batch=512):
+        self.model = model
+        self.metrics = metrics
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+
+    async def predict(self, features):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            features = pd.DataFrame(np.vstack([features for features, _ in batch]), columns=selected_features)
+            self.metrics.record_batch(len(batch))
+            try:
+                # Score off the event loop so requests keep queueing for the next batch meanwhile
+                probabilities = await loop.run_in_executor(None, score_batch, self.model, features)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), probability in zip(batch, probabilities):
+                    if not future.done():
+                        future.set_result(float(probability))
+
+
+class ScoringService:
+    def __init__(self, model, risk_index, max_wait=0.002, max_batch=512):
+        self.model = model
+        self.risk_index = risk_index
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(model, self.metrics, max_wait, max_batch)
+
+    def lookup(self, item):
+        if 'season' not in item:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "A player lookup needs both name and season")
+        name, season = str(item['name']).strip().lower(), str(item['season']).strip()
+        entry = self.risk_index.get((name, season))
+        if entry is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No player {item['name']!r} in season {season!r}")
+        return {'name': item['name'], 'season': season, 'probability': entry.probability,
+                'risk_level': str(RISK_LEVELS[entry.level])}
+
+    @staticmethod
+    def feature_vector(item):
+        # Plain floats, no DataFrame until the batch is scored; same column normalization and USG_PCT
+        # percent-to-fraction rule as the streaming scorer
+        if not isinstance(item, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Expected the features as a JSON object")
+        values = {normalize_column(key): value for key, value in item.items()}
+        try:
+            vector = np.array([float(values[feature]) for feature in selected_features])
+        except KeyError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Missing feature columns: {e.args[0]}")
+        except (TypeError, ValueError):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Feature values must all be numbers")
+        if not np.isfinite(vector).all():
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Feature values must all be numbers")
+        usage = selected_features.index('USG_PCT')
+        if vector[usage] > 1:
+            vector[usage] /= 100
+        return vector
+
+    async def predict(self, body):
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+        if 'name' in body:
+            return self.lookup(body)
+        probability = await self.batcher.predict(self.feature_vector(body.get('features', body)))
+        return {'probability': probability, 'risk_level': str(risk_levels([probability])[0])}
+
+    async def predict_batch(self, body):
+        players = body.get('players') if isinstance(body, dict) else None
+        if not isinstance(players, list) or not all(isinstance(item, dict) for item in players):
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'Expected {"players": [objects]}')
+
+        # A bad item gets an error result of its own; the rest of the batch is still answered
+        results = [None] * len(players)
+        to_score, vectors = [], []
+        for i, item in enumerate(players):
+            if 'name' in item:
+                try:
+                    results[i] = self.lookup(item)
+                except RequestError as e:
+                    results[i] = {'name': item['name'], 'error': str(e)}
+                continue
+            try:
+                vectors.append(self.feature_vector(item.get('features', item)))
+            except RequestError as e:
+                results[i] = {'error': str(e)}
+            else:
+                to_score.append(i)
+
+        if to_score:
+            features = pd.DataFrame(np.vstack(vectors), columns=selected_features)
+            self.metrics.record_batch(len(features))
+            probabilities = await asyncio.get_running_loop().run_in_executor(None, score_batch, self.model,
+                                                                             features)
+            for i, probability, level in zip(to_score, probabilities, risk_levels(probabilities)):
+                results[i] = {'probability': float(probability), 'risk_level': str(level)}
+        return {'results': results}
+
+    async def route(self, method, path, body):
+        if path == '/predict' and method == 'POST':
+            return await self.predict(self.parse_json(body))
+        if path == '/predict/batch' and method == 'POST':
+            return await self.predict_batch(self.parse_json(body))
+        if path == '/metrics' and method == 'GET':
+            return self.metrics.snapshot()
+        if path == '/health' and method == 'GET':
+            return {'status': 'ok'}
+        if path in ENDPOINTS:
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No endpoint {path}")
+
+    @staticmethod
+    def parse_json(body):
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                start = time.perf_counter()
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                path = path.split('?', 1)[0]
+
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+
+                try:
+                    if length > MAX_BODY_BYTES:
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = HTTPStatus.OK, await self.route(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                # Any other path is counted as 'other', so probing random URLs cannot grow the metrics
+                endpoint = path if path in ENDPOINTS else 'other'
+                self.metrics.record_request(endpoint, status.value, time.perf_counter() - start)
+                if not keep_alive or status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away or sent something that is not HTTP
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        batcher = asyncio.create_task(self.batcher.run())
+        print(f"Scoring service listening on http://{host}:{port}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve injury risk predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8000, type=int)
+    parser.add_argument("--max-wait-ms", default=2.0, type=float,
+                        help="how long single predictions wait to be batched with others")
+    parser.add_argument("--max-batch", default=512, type=int, help="largest micro-batch sent to the model")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(load_model(), load_risk_index(), args.max_wait_ms / 1000, args.max_batch)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
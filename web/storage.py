@@ -0,0 +1,105 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pathlib import Path
+
+from atomic import atomic_path
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+path_to_merged = dir.parent / 'merged.csv'
+
+# Low-cardinality text columns, stored dictionary-encoded and loaded as pandas categoricals
+categorical_columns = ['PLAYER_NAME', 'SEASON', 'TEAM', 'INJURED_TYPE']
+
+SOURCE_KEY = b'source_stat'
+
+
+def columnar_path(csv_path):
+    return Path(csv_path).with_suffix('.arrow')
+
+
+def read_source_csv(csv_path, columns=None):
+    # merged.csv pads numbers with spaces and writes missing tracking stats as ' None'
+    return pd.read_csv(csv_path, usecols=columns, skipinitialspace=True, na_values=['None'])
+
+
+def source_fingerprint(csv_path):
+    # Size and modification time: stat-ing the CSV costs the same at any row count, unlike hashing its bytes
+    stat = os.stat(csv_path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'.encode()
+
+
+def compact_types(df):
+    df = df.copy()
+    for column in df.columns:
+        if column in categorical_columns:
+            df[column] = df[column].astype('category')
+        elif pd.api.types.is_float_dtype(df[column]):
+            df[column] = df[column].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(df[column]) and column != 'PLAYER_ID':
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+
+def convert_csv(csv_path, out_path=None):
+    """Write csv_path as an uncompressed Arrow IPC file, which can be memory-mapped on load."""
+    out_path = Path(out_path) if out_path else columnar_path(csv_path)
+    # Record which CSV this copy was made from, so read_table can tell when it is stale; taken before reading,
+    # so a CSV rewritten mid-conversion leaves the copy marked stale
+    source = source_fingerprint(csv_path)
+    table = pa.Table.from_pandas(compact_types(read_source_csv(csv_path)), preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), SOURCE_KEY: source}
+    table = table.replace_schema_metadata(metadata)
+    with atomic_path(out_path) as tmp_path:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+    return out_path
+
+
+def is_current(csv_path, arrow_path):
+    """Whether arrow_path is a readable copy of csv_path as it is now; a copy shipped without its CSV counts."""
+    try:
+        with pa.memory_map(str(arrow_path)) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except pa.ArrowInvalid:
+        return False  # truncated or not an Arrow file at all
+    return not Path(csv_path).exists() or metadata.get(SOURCE_KEY) == source_fingerprint(csv_path)
+
+
+def read_table(csv_path, columns=None):
+    """Load a table from its columnar copy when one exists, otherwise parse the CSV.
+
+    A stale or unreadable copy is regenerated first, or skipped when it cannot be rewritten."""
+    arrow_path = columnar_path(csv_path)
+    if not arrow_path.exists():
+        return read_source_csv(csv_path, columns)
+    try:
+        if not is_current(csv_path, arrow_path):
+            convert_csv(csv_path, arrow_path)
+        table = feather.read_table(arrow_path, columns=columns, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return read_source_csv(csv_path, columns)
+
+    # split_blocks lets null-free numeric columns stay backed by the memory map instead of being copied
+    return table.to_pandas(split_blocks=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert CSVs read by the app to memory-mappable Arrow files.")
+    parser.add_argument("csv", nargs="*", type=Path, default=[path_to_player],
+                        help="default: PlayerStats.csv, the only table the app loads on every start")
+    args = parser.parse_args(argv)
+
+    for csv_path in args.csv:
+        out_path = convert_csv(csv_path)
+        print(f"{csv_path.name}: {csv_path.stat().st_size:,} bytes -> {out_path.name}: {out_path.stat().st_size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
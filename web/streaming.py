@@ -0,0 +1,108 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoring import DEFAULT_CHUNK_SIZE, load_model, risk_levels, score_batch, selected_features
+
+# Header spellings seen in NBA stats exports that differ from our feature names once normalized
+column_aliases = {'FGA': 'FGA_PG', 'USG': 'USG_PCT'}
+
+
+def normalize_column(name):
+    # 'USG%' -> 'USG_PCT', 'Dist. Miles' -> 'DIST_MILES', 'FRONT CT TOUCHES' -> 'FRONT_CT_TOUCHES'
+    name = str(name).strip().upper().replace('%', '_PCT')
+    name = re.sub(r'[^A-Z0-9]+', '_', name).strip('_')
+    return column_aliases.get(name, name)
+
+
+def resolve_feature_columns(columns):
+    """Map each model feature to the input column that holds it."""
+    normalized = {normalize_column(column): column for column in columns}
+    missing = [feature for feature in selected_features if feature not in normalized]
+    if missing:
+        raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+    return {feature: normalized[feature] for feature in selected_features}
+
+
+def prepare_features(chunk, feature_columns):
+    features = pd.DataFrame({feature: pd.to_numeric(chunk[column], errors='coerce')
+                             for feature, column in feature_columns.items()}, index=chunk.index)
+    # Same rule as the Data form: usage above 1 was entered as a percentage
+    usage = features['USG_PCT']
+    features['USG_PCT'] = usage.where(~(usage > 1), usage / 100)
+    return features
+
+
+def score_chunk(model, chunk, feature_columns):
+    features = prepare_features(chunk, feature_columns)
+    valid = features.notna().all(axis=1).to_numpy()
+
+    probabilities = np.full(len(chunk), np.nan)
+    if valid.any():
+        probabilities[valid] = score_batch(model, features[valid])
+
+    scored = chunk.copy()
+    scored['RISK_PROBABILITY'] = probabilities
+    # Rows with missing or non-numeric features are kept, without a risk level
+    scored['RISK_LEVEL'] = np.where(valid, risk_levels(np.nan_to_num(probabilities)), '')
+    return scored
+
+
+def stream_scores(model, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Score input_path chunk by chunk, appending each scored chunk to output_path in input order.
+
+    At most two chunks per worker are held in memory at once, however large the input is.
+    """
+    workers = workers or os.cpu_count() or 1
+    rows = 0
+    pending = deque()
+    feature_columns = None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(output_path, 'w', newline='') as output:
+
+        def write_oldest():
+            nonlocal rows
+            scored = pending.popleft().result()
+            scored.to_csv(output, header=rows == 0, index=False)
+            rows += len(scored)
+
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size, skipinitialspace=True, na_values=['None']):
+            if feature_columns is None:
+                feature_columns = resolve_feature_columns(chunk.columns)
+            # The forest's tree traversal releases the GIL, so threads score chunks in parallel
+            pending.append(pool.submit(score_chunk, model, chunk, feature_columns))
+            if len(pending) >= 2 * workers:
+                write_oldest()
+
+        while pending:
+            write_oldest()
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a tracking export of any size chunk by chunk.")
+    parser.add_argument("input", help="CSV export (optionally compressed) with the ten model features")
+    parser.add_argument("output", help="CSV file to write the scored rows to")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("--chunk-size", default=DEFAULT_CHUNK_SIZE, type=int, help="rows read and scored at a time")
+    parser.add_argument("--workers", type=int, help="scoring threads (default: one per core)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = stream_scores(load_model(args.model, bulk=True), args.input, args.output, args.chunk_size, args.workers)
+    seconds = time.perf_counter() - start
+    print(f"Scored {rows:,} rows in {seconds:.1f} s ({rows / seconds:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import sys
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoring import load_model, score_batch, selected_features
+
+dir = Path(__file__).resolve().parent  # Get the directory of the script file
+
+path_to_player = dir / 'data' / 'PlayerStats.csv'
+
+DEFAULT_SPREAD = 0.5  # sweep each feature from 50% below to 50% above the player's value
+DEFAULT_STEPS = 50
+
+
+def sweep_axes(base, features, spread=DEFAULT_SPREAD, steps=DEFAULT_STEPS, fallback=None):
+    """Evenly spaced values of each swept feature around the player's own value, never below zero.
+
+    fallback maps a feature to (low, high) for players whose value is zero, where a relative spread is empty."""
+    axes = {}
+    for feature in features:
+        value = float(base[feature])
+        low, high = value * (1 - spread), value * (1 + spread)
+        if value == 0 and fallback is not None:
+            low, high = fallback[feature]
+        axes[feature] = np.linspace(max(low, 0.0), high, steps)
+    return axes
+
+
+def sweep_features(base, axes):
+    # One row per grid point; the first swept feature varies fastest, matching a heat map's x axis
+    grid = np.meshgrid(*axes.values())
+    features = pd.DataFrame(np.tile(base[selected_features].to_numpy(dtype=np.float64), (grid[0].size, 1)),
+                            columns=selected_features)
+    for feature, values in zip(axes, grid):
+        features[feature] = values.ravel()
+    return features
+
+
+def score_sweep(model, base, axes):
+    """Injury probability at every grid point, scored in one batch; shape (steps,) or (steps_2, steps_1)."""
+    probabilities = score_batch(model, sweep_features(base, axes))
+    shape = [len(values) for values in axes.values()][::-1]
+    return probabilities.reshape(shape)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Injury probability of a player as one or two features vary.")
+    parser.add_argument("name", help="player name as in PlayerStats.csv, e.g. 'Stephen Curry'")
+    parser.add_argument("season", help="e.g. 22-23")
+    parser.add_argument("features", nargs="+", choices=selected_features, help="one or two features to vary")
+    parser.add_argument("--spread", default=DEFAULT_SPREAD, type=float, help="relative range around the player")
+    parser.add_argument("--steps", default=DEFAULT_STEPS, type=int, help="grid points per feature")
+    parser.add_argument("--model", type=Path, help="flat forest export or pickled random forest")
+    parser.add_argument("-o", "--output", help="where to write the grid (default: stdout)")
+    args = parser.parse_args(argv)
+    if len(args.features) > 2:
+        parser.error("vary at most two features")
+
+    df_player = pd.read_csv(path_to_player)
+    player = df_player[(df_player['PLAYER_NAME'].str.lower() == args.name.lower())
+                       & (df_player['SEASON'] == args.season)]
+    if player.empty:
+        parser.error(f"no player {args.name!r} in season {args.season}")
+
+    fallback = {feature: (df_player[feature].min(), df_player[feature].max()) for feature in args.features}
+    base = player.iloc[0]
+    axes = sweep_axes(base, args.features, args.spread, args.steps, fallback)
+    grid = sweep_features(base, axes)[args.features]
+    grid['RISK_PROBABILITY'] = score_sweep(load_model(args.model), base, axes).ravel()
+    grid.to_csv(args.output if args.output else sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
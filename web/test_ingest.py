@@ -0,0 +1,59 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ingest import MIN_GAMES_PLAYED, refresh
+from scoring import selected_features
+
+
+class ConstantModel:
+    def predict_proba(self, X):
+        return np.tile([0.7, 0.3], (len(X), 1))
+
+
+def merged_rows():
+    rows = [(1, 'First Player', '22-23', 60, None), (2, 'Second Player', '22-23', 40, 'Ankle')]
+    df = pd.DataFrame(rows, columns=['PLAYER_ID', 'PLAYER_NAME', 'SEASON', 'GP', 'INJURED_TYPE'])
+    for i, feature in enumerate(selected_features):
+        df[feature] = float(i + 1)
+    return df
+
+
+def test_partition_falling_under_min_games_is_written(tmp_path):
+    paths = {'player_path': tmp_path / 'PlayerStats.csv', 'index_path': tmp_path / 'risk_index.pkl',
+             'state_path': tmp_path / 'ingest_state.pkl'}
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'model')
+    merged = merged_rows()
+
+    summary, written = refresh(merged, ConstantModel(), model_path, **paths)
+    assert written and summary['rows'] == 2
+    assert len(pd.read_csv(paths['player_path'])) == 2
+
+    # The changed partition loses its only row, so nothing is scored, but the outputs must still drop it
+    merged.loc[merged['PLAYER_ID'] == 1, 'GP'] = MIN_GAMES_PLAYED - 1
+    summary, written = refresh(merged, ConstantModel(), model_path, **paths)
+    assert summary['changed'] == 1 and summary['rows_scored'] == 0
+    assert written
+    assert pd.read_csv(paths['player_path'])['PLAYER_NAME'].tolist() == ['Second Player']
+    with open(paths['index_path'], 'rb') as file:
+        assert list(pickle.load(file)['entries']) == [('second player', '22-23')]
+
+    player_stats = paths['player_path'].read_bytes()
+    summary, written = refresh(merged, ConstantModel(), model_path, **paths)
+    assert not written
+    assert summary['changed'] == summary['new'] == summary['removed'] == summary['rows_scored'] == 0
+    assert paths['player_path'].read_bytes() == player_stats
+
+
+def test_refresh_accepts_string_paths(tmp_path):
+    paths = {'player_path': str(tmp_path / 'PlayerStats.csv'), 'index_path': str(tmp_path / 'risk_index.pkl'),
+             'state_path': str(tmp_path / 'ingest_state.pkl')}
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'model')
+
+    summary, written = refresh(merged_rows(), ConstantModel(), str(model_path), **paths)
+    assert written and summary['new'] == 2
+    with open(paths['index_path'], 'rb') as file:
+        assert len(pickle.load(file)['entries']) == 2